@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -5,10 +7,7 @@ load_dotenv()
 
 
 from routes import user
-from core.database import Base, engine
-
-
-from models import plan as plan_model
+from core.database import begin_request_scope, end_request_scope
 
 
 from routes import user
@@ -16,14 +15,29 @@ from routes import plan
 from routes import investment
 from routes.payment_routes import router as payment_router
 from routes import admin
+from routes import metrics
+from utils.email_outbox import outbox_workers
+from utils.hash_password import hashing_executor
 
 
 
 
-Base.metadata.create_all(bind=engine)
+# No DDL at startup: schema changes are migrations (alembic upgrade head,
+# see alembic.ini), run once per deploy before the workers start.
 
 
-app = FastAPI(title="Investment Service")
+# ---------------------------
+# BACKGROUND WORKERS
+# ---------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    outbox_workers.start()
+    yield
+    outbox_workers.stop()
+    hashing_executor.shutdown()
+
+
+app = FastAPI(title="Investment Service", lifespan=lifespan)
 
 
 # ---------------------------
@@ -35,17 +49,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # paging cursor and ETag of the list endpoints must be readable by browsers
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
 
 # ---------------------------
 # ROUTES
 # ---------------------------
+# one "has this request written?" holder per request, for replica routing
+@app.middleware("http")
+async def db_request_scope(request, call_next):
+    token = begin_request_scope()
+    try:
+        return await call_next(request)
+    finally:
+        end_request_scope(token)
+
+
 app.include_router(user.router)
 app.include_router(plan.router)
 app.include_router(investment.router)
 app.include_router(payment_router)
 app.include_router(admin.router)
+app.include_router(metrics.router)
 
 
 
@@ -1,8 +1,22 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import Pool
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+import asyncio
+import itertools
+import logging
 import os
+import time
 from dotenv import load_dotenv
 
+from core.pool_metrics import TimedAsyncQueuePool, TimedQueuePool, instrument_engine
+
 # load env file
 load_dotenv()
 
@@ -11,27 +25,218 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 
 print("USING DATABASE_URL =", DATABASE_URL)  # TEMP for debugging
 
+# ---------------------------
+# POOL SETTINGS (every engine: primary, async, replicas)
+# ---------------------------
+# Sync routes run on a 40-thread pool per process: size + overflow below
+# that means requests can queue on checkout (see pool_stats() / /metrics).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+POOL_OPTIONS = dict(
+    pool_pre_ping=DB_POOL_PRE_PING,   # ✅ checks dead connections
+    pool_recycle=DB_POOL_RECYCLE,     # ✅ recycle every 30 min
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+)
+
 # Create engine
 
 # engine = create_engine(DATABASE_URL)
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,        # ✅ checks dead connections
-    pool_recycle=1800,         # ✅ recycle every 30 min
-    pool_size=5,
-    max_overflow=10,
-)
+engine = create_engine(DATABASE_URL, poolclass=TimedQueuePool, **POOL_OPTIONS)
+instrument_engine("primary", engine)
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------------------
+# READ REPLICAS (optional)
+# ---------------------------
+# DATABASE_REPLICA_URLS: comma-separated replica URLs. When set, sessions
+# from get_read_db / get_async_read_db send plain SELECTs to the replicas
+# (round robin) and everything else to the primary:
+# - flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE and raw text()
+#   always go to the primary
+# - once anything in the request has written, later reads in that
+#   request stay on the primary (read-your-writes)
+# - a replica that fails its connect check is marked down for
+#   DATABASE_REPLICA_RETRY_SECONDS and its reads fall back to the primary
+# Without replicas every session behaves exactly like before.
+
+DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+REPLICA_RETRY_SECONDS = float(os.getenv("DATABASE_REPLICA_RETRY_SECONDS", "30"))
+
+
+class ReplicaSet:
+    def __init__(self, urls: list[str], retry_seconds: float):
+        self.urls = urls
+        self.retry_seconds = retry_seconds
+        self._engines = [None] * len(urls)
+        self._async_engines = [None] * len(urls)
+        self._down_until = [0.0] * len(urls)
+        self._next = itertools.count()
+        self.fallbacks = 0
+
+    def __bool__(self):
+        return bool(self.urls)
+
+    def engine(self, i: int, is_async: bool = False):
+        # created on first use, like the async primary
+        engines = self._async_engines if is_async else self._engines
+        if engines[i] is None:
+            if is_async:
+                engines[i] = create_async_engine(
+                    _derive_async_url(self.urls[i]), poolclass=TimedAsyncQueuePool, **POOL_OPTIONS
+                )
+                instrument_engine(f"replica_{i}_async", engines[i].sync_engine)
+            else:
+                engines[i] = create_engine(self.urls[i], poolclass=TimedQueuePool, **POOL_OPTIONS)
+                instrument_engine(f"replica_{i}", engines[i])
+        # sessions bind to the sync face of an async engine
+        return engines[i].sync_engine if is_async else engines[i]
+
+    def candidates(self):
+        """Replica indexes that are up, starting at the next round-robin slot."""
+        now = time.monotonic()
+        start = next(self._next)
+        for offset in range(len(self.urls)):
+            i = (start + offset) % len(self.urls)
+            if self._down_until[i] <= now:
+                yield i
+
+    def mark_down(self, i: int, error: Exception):
+        self._down_until[i] = time.monotonic() + self.retry_seconds
+        logger.warning(
+            "read replica %s marked down for %.0fs: %s",
+            make_url(self.urls[i]).render_as_string(hide_password=True),
+            self.retry_seconds,
+            error,
+        )
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "replicas": len(self.urls),
+            "up": sum(1 for until in self._down_until if until <= now),
+            "primary_fallbacks": self.fallbacks,
+        }
+
+
+replicas = ReplicaSet(DATABASE_REPLICA_URLS, REPLICA_RETRY_SECONDS)
+
+
+# Per-request "has written" flag. The middleware installs a fresh holder
+# per request; it is mutated in place, so a write made in a threadpool
+# dependency (copied context) is still seen by the rest of the request.
+_request_writes: ContextVar[Optional[dict]] = ContextVar("db_request_writes", default=None)
+
+
+def begin_request_scope():
+    return _request_writes.set({"wrote": False})
+
+
+def end_request_scope(token):
+    _request_writes.reset(token)
+
+
+def _is_write(session: Session, clause) -> bool:
+    return (
+        session._flushing
+        or isinstance(clause, (UpdateBase, TextClause))
+        or getattr(clause, "_for_update_arg", None) is not None
+    )
+
+
+class RoutingSession(Session):
+    """
+    Session that may read from a replica (read_only=True) and otherwise
+    uses its bind (the primary). Writes are recorded in the request
+    scope whatever the session's mode.
+    """
+
+    def __init__(self, *args, read_only: bool = False, **kw):
+        super().__init__(*args, **kw)
+        self.read_only = read_only
+        self._replica_bind = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kw)
+
+        if _is_write(self, clause):
+            state = _request_writes.get()
+            if state is not None:
+                state["wrote"] = True
+            return primary
+
+        state = _request_writes.get()
+        if not self.read_only or not replicas or (state is not None and state["wrote"]):
+            return primary
+
+        if self._replica_bind is None:
+            self._replica_bind = self._pick_replica(primary)
+        return self._replica_bind
+
+    def _pick_replica(self, primary):
+        is_async = primary.dialect.is_async
+        for i in replicas.candidates():
+            replica = replicas.engine(i, is_async)
+            try:
+                # health check: opens this session's connection to the
+                # replica (pool_pre_ping validates a pooled one)
+                self.connection(bind_arguments={"bind": replica})
+                return replica
+            except (exc.DBAPIError, OSError, asyncio.TimeoutError) as error:
+                # asyncpg raises connect failures raw (ConnectionRefusedError,
+                # timeouts), not wrapped in DBAPIError
+                replicas.mark_down(i, error)
+        replicas.fallbacks += 1
+        return primary
+
 
 # Session and Base
+# Sessions check a connection out on first use and give it back on
+# commit / close. expire_on_commit=False keeps committed objects readable
+# without checking a connection out again to reload them.
 SessionLocal = sessionmaker(
+    class_=RoutingSession,
     autocommit=False, 
     autoflush=False, 
+    expire_on_commit=False,
+    bind=engine
+)
+
+# reads may go to a replica (see READ REPLICAS)
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession,
+    read_only=True,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
     bind=engine
 )
 
 
 Base = declarative_base()
 
+
+def dialect_insert(db):
+    """insert() of the session's dialect, for INSERT ... ON CONFLICT."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"no INSERT ... ON CONFLICT support for dialect {dialect}")
+    return insert
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -40,3 +245,102 @@ def get_db():
         db.close()
 
 
+def get_read_db():
+    """get_db for read-only routes: may be served by a replica."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# ---------------------------
+# NO CONNECTION HELD DURING EXTERNAL I/O
+# ---------------------------
+# A read opens a transaction that keeps its pooled connection until
+# commit / rollback / close. Before slow external I/O (object storage,
+# email, password hashing), end it with release_connection(), then run
+# the I/O inside no_db_held(): checking a connection out in there raises,
+# so a slow provider cannot pin pool connections.
+
+_no_db_held: ContextVar[bool] = ContextVar("no_db_held", default=False)
+
+
+def release_connection(db: Session):
+    """End a read-only transaction so its connection goes back to the pool."""
+    if db.new or db.dirty or db.deleted:
+        raise RuntimeError("session has unflushed changes: commit or roll back instead")
+    if db.in_transaction():
+        # commit, not rollback: rollback would expire the loaded objects
+        db.commit()
+
+
+@contextmanager
+def no_db_held(*sessions: Session):
+    for db in sessions:
+        if db.in_transaction():
+            raise RuntimeError("session still holds a DB connection: commit or release_connection() first")
+
+    token = _no_db_held.set(True)
+    try:
+        yield
+    finally:
+        _no_db_held.reset(token)
+
+
+@event.listens_for(Pool, "checkout")
+def _forbid_checkout_in_no_db_held(dbapi_connection, connection_record, connection_proxy):
+    if _no_db_held.get():
+        raise RuntimeError("DB connection checked out inside no_db_held()")
+
+
+# ---------------------------
+# ASYNC ENGINE (asyncpg)
+# ---------------------------
+# Used by the read-heavy async routes: a request waiting on Postgres no
+# longer holds one of the threadpool's threads. Same database as
+# DATABASE_URL unless ASYNC_DATABASE_URL says otherwise.
+
+_ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def _derive_async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name(), parsed.drivername)
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _derive_async_url(DATABASE_URL)
+
+_async_engine = None
+
+
+def get_async_engine():
+    # created on first use: the async driver is only imported when needed
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL, poolclass=TimedAsyncQueuePool, **POOL_OPTIONS
+        )
+        instrument_engine("primary_async", _async_engine.sync_engine)
+    return _async_engine
+
+
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db():
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+
+async def get_async_read_db():
+    async with AsyncSessionLocal(bind=get_async_engine(), read_only=True) as db:
+        yield db
+
+
@@ -0,0 +1,161 @@
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# ========================
+# CONNECTION POOL METRICS
+# ========================
+# Per engine pool:
+# - wait: time spent in checkout before a connection was handed over
+#   (queueing on a full pool shows up here, timeouts are counted too)
+# - hold: checkout -> checkin, i.e. how long callers keep a connection
+# - peaks of checked-out connections and of overflow in use
+# - connects / invalidations (dead or recycled connections)
+# A checkout waiting DB_POOL_WAIT_WARN_MS or more logs a warning, at most
+# once per DB_POOL_WAIT_WARN_INTERVAL_SECONDS per pool.
+
+POOL_WAIT_WARN_MS = float(os.getenv("DB_POOL_WAIT_WARN_MS", "100"))
+POOL_WAIT_WARN_INTERVAL_SECONDS = float(os.getenv("DB_POOL_WAIT_WARN_INTERVAL_SECONDS", "5"))
+
+
+class PoolMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.wait_ms = Histogram()
+        self.hold_ms = Histogram()
+        self._lock = threading.Lock()
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.checked_out_peak = 0
+        self.overflow_peak = 0
+        self._slow = 0
+        self._last_warning = 0.0
+
+    def record_checkout(self, pool, wait_ms: float, timed_out: bool):
+        self.wait_ms.observe(wait_ms)
+
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checked_out_peak = max(self.checked_out_peak, pool.checkedout())
+                self.overflow_peak = max(self.overflow_peak, pool.overflow())
+
+            if wait_ms < POOL_WAIT_WARN_MS:
+                return
+            self._slow += 1
+            now = time.monotonic()
+            if now - self._last_warning < POOL_WAIT_WARN_INTERVAL_SECONDS:
+                return
+            slow, self._slow, self._last_warning = self._slow, 0, now
+
+        logger.warning(
+            "DB pool %s: checkout waited %.0f ms%s (%d slow checkouts since last warning; "
+            "checked out %d, size %d, overflow %d/%d)",
+            self.name, wait_ms, " and timed out" if timed_out else "", slow,
+            pool.checkedout(), pool.size(), max(pool.overflow(), 0), pool._max_overflow,
+        )
+
+    def stats(self, pool) -> dict:
+        with self._lock:
+            counters = {
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "checked_out_peak": self.checked_out_peak,
+                "overflow_peak": max(self.overflow_peak, 0),
+            }
+        return {
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            **counters,
+            "wait_ms": self.wait_ms.snapshot(),
+            "hold_ms": self.hold_ms.snapshot(),
+        }
+
+
+class _TimedPoolMixin:
+    """Times _do_get, the part of checkout that queues on a full pool."""
+
+    _metrics = None
+
+    def _do_get(self):
+        if self._metrics is None:
+            return super()._do_get()
+
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            self._metrics.record_checkout(self, (time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        self._metrics.record_checkout(self, (time.perf_counter() - start) * 1000, timed_out=False)
+        return conn
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool: keep counting into the same metrics
+        pool = super().recreate()
+        pool._metrics = self._metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+_pools: dict = {}
+
+
+def instrument_engine(name: str, engine):
+    """Attach metrics to a (sync) engine created with a Timed* pool class."""
+    metrics = PoolMetrics(name)
+    engine.pool._metrics = metrics
+
+    # engine-level pool events survive pool recreation
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        with metrics._lock:
+            metrics.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            metrics.hold_ms.observe((time.perf_counter() - started) * 1000)
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, connection_record, exception):
+        with metrics._lock:
+            metrics.invalidations += 1
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _soft_invalidate(dbapi_connection, connection_record, exception):
+        with metrics._lock:
+            metrics.soft_invalidations += 1
+
+    _pools[name] = (engine, metrics)
+
+
+def pool_stats() -> dict:
+    return {name: metrics.stats(engine.pool) for name, (engine, metrics) in list(_pools.items())}
@@ -0,0 +1,52 @@
+"""hot path indexes
+
+Indexes for the filters the busy endpoints run on:
+- inv_config(created_by)               /investments/my, portfolio jobs
+- inv_config(plan_type_id)             listings and dashboard by plan
+- inv_config(is_active, maturity_date) status filters, maturity job
+- user_registration(role_id)           /users/?role_id, investor count
+
+IF NOT EXISTS: databases whose app startup already created
+ix_inv_config_is_active_maturity_date upgrade cleanly. On PostgreSQL the
+indexes build CONCURRENTLY, so the tables stay writable. If a build is
+interrupted it leaves an INVALID index that IF NOT EXISTS would skip:
+drop it and run the upgrade again.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = (
+    ("ix_inv_config_created_by", "inv_config", ["created_by"]),
+    ("ix_inv_config_plan_type_id", "inv_config", ["plan_type_id"]),
+    ("ix_inv_config_is_active_maturity_date", "inv_config", ["is_active", "maturity_date"]),
+    ("ix_user_registration_role_id", "user_registration", ["role_id"]),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
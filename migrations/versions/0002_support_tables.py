@@ -0,0 +1,83 @@
+"""support tables
+
+Tables the app used to create on startup: id_allocator (hi/lo id
+blocks), dashboard_rollup + dashboard_rollup_meta (admin dashboard) and
+user_portfolio_summary (per-investor totals).
+
+IF NOT EXISTS: on databases where startup already created them this
+revision only records them. After a fresh create, run
+`python -m scripts.dashboard_rollup rebuild` and
+`python -m scripts.reconcile_portfolios` to fill them.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "id_allocator",
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("next_value", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("name", name="pk_id_allocator_name"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "dashboard_rollup",
+        sa.Column("plan_type_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("investment_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("total_principal", sa.Numeric(18, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("total_interest", sa.Numeric(18, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("total_maturity", sa.Numeric(18, 2), server_default=sa.text("0"), nullable=False),
+        sa.PrimaryKeyConstraint("plan_type_id", "day", "status", name="pk_dashboard_rollup"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "dashboard_rollup_meta",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("investor_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("matured_through", sa.Date(), nullable=True),
+        sa.PrimaryKeyConstraint("id", name="pk_dashboard_rollup_meta_id"),
+        if_not_exists=True,
+    )
+    op.create_table(
+        "user_portfolio_summary",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("investment_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("total_principal_amount", sa.Numeric(18, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("total_maturity_amount", sa.Numeric(18, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("first_investment_date", sa.DateTime(), nullable=True),
+        sa.Column("last_maturity_date", sa.Date(), nullable=True),
+        sa.Column("active_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("active_principal_amount", sa.Numeric(18, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("active_maturity_amount", sa.Numeric(18, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("completed_count", sa.BigInteger(), server_default=sa.text("0"), nullable=False),
+        sa.Column("completed_principal_amount", sa.Numeric(18, 2), server_default=sa.text("0"), nullable=False),
+        sa.Column("completed_maturity_amount", sa.Numeric(18, 2), server_default=sa.text("0"), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", name="pk_user_portfolio_summary_user_id"),
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_portfolio_summary", if_exists=True)
+    op.drop_table("dashboard_rollup_meta", if_exists=True)
+    op.drop_table("dashboard_rollup", if_exists=True)
+    op.drop_table("id_allocator", if_exists=True)
@@ -90,7 +90,10 @@ class InvConfig(Base):
     __table_args__ = (
         ForeignKeyConstraint(['plan_type_id'], ['master_plan_type.id'], name='fk_inv_config_plan_type_id'),
         PrimaryKeyConstraint('id', name='pk_inv_config_id'),
-        UniqueConstraint('uk_inv_id', name='uk_inv_config_uk_inv_id')
+        UniqueConstraint('uk_inv_id', name='uk_inv_config_uk_inv_id'),
+        Index('ix_inv_config_created_by', 'created_by'),
+        Index('ix_inv_config_is_active_maturity_date', 'is_active', 'maturity_date'),
+        Index('ix_inv_config_plan_type_id', 'plan_type_id')
     )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
@@ -119,7 +122,8 @@ class UserRegistration(Base):
         PrimaryKeyConstraint('id', name='pk_user_registration_id'),
         UniqueConstraint('email', name='uk_user_registration_email'),
         UniqueConstraint('inv_reg_id', name='uk_user_registration_inv_reg_id'),
-        UniqueConstraint('mobile', name='uk_user_registration_mobile')
+        UniqueConstraint('mobile', name='uk_user_registration_mobile'),
+        Index('ix_user_registration_role_id', 'role_id')
     )
 
     id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
@@ -147,3 +151,59 @@ class UserRegistration(Base):
     bank: Mapped[Optional['MasterBank']] = relationship('MasterBank', back_populates='user_registration')
     gender: Mapped['MasterGender'] = relationship('MasterGender', back_populates='user_registration')
     role: Mapped['MasterRole'] = relationship('MasterRole', back_populates='user_registration')
+
+
+class IdAllocator(Base):
+    __tablename__ = 'id_allocator'
+    __table_args__ = (
+        PrimaryKeyConstraint('name', name='pk_id_allocator_name'),
+    )
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    next_value: Mapped[int] = mapped_column(BigInteger, nullable=False)
+
+
+class DashboardRollup(Base):
+    __tablename__ = 'dashboard_rollup'
+    __table_args__ = (
+        PrimaryKeyConstraint('plan_type_id', 'day', 'status', name='pk_dashboard_rollup'),
+    )
+
+    plan_type_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[datetime.date] = mapped_column(Date, primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    investment_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text('0'))
+    total_principal: Mapped[decimal.Decimal] = mapped_column(Numeric(18, 2), nullable=False, server_default=text('0'))
+    total_interest: Mapped[decimal.Decimal] = mapped_column(Numeric(18, 2), nullable=False, server_default=text('0'))
+    total_maturity: Mapped[decimal.Decimal] = mapped_column(Numeric(18, 2), nullable=False, server_default=text('0'))
+
+
+class DashboardRollupMeta(Base):
+    __tablename__ = 'dashboard_rollup_meta'
+    __table_args__ = (
+        PrimaryKeyConstraint('id', name='pk_dashboard_rollup_meta_id'),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    investor_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text('0'))
+    matured_through: Mapped[Optional[datetime.date]] = mapped_column(Date)
+
+
+class UserPortfolioSummary(Base):
+    __tablename__ = 'user_portfolio_summary'
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', name='pk_user_portfolio_summary_user_id'),
+    )
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    investment_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text('0'))
+    total_principal_amount: Mapped[decimal.Decimal] = mapped_column(Numeric(18, 2), nullable=False, server_default=text('0'))
+    total_maturity_amount: Mapped[decimal.Decimal] = mapped_column(Numeric(18, 2), nullable=False, server_default=text('0'))
+    first_investment_date: Mapped[Optional[datetime.datetime]] = mapped_column(DateTime)
+    last_maturity_date: Mapped[Optional[datetime.date]] = mapped_column(Date)
+    active_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text('0'))
+    active_principal_amount: Mapped[decimal.Decimal] = mapped_column(Numeric(18, 2), nullable=False, server_default=text('0'))
+    active_maturity_amount: Mapped[decimal.Decimal] = mapped_column(Numeric(18, 2), nullable=False, server_default=text('0'))
+    completed_count: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text('0'))
+    completed_principal_amount: Mapped[decimal.Decimal] = mapped_column(Numeric(18, 2), nullable=False, server_default=text('0'))
+    completed_maturity_amount: Mapped[decimal.Decimal] = mapped_column(Numeric(18, 2), nullable=False, server_default=text('0'))
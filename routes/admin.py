@@ -1,24 +1,40 @@
+from datetime import date
+from typing import Literal
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
-from utils.auth import get_current_user
-from models.generated_models import UserRegistration
-from services.admin_dashboard_service import get_admin_dashboard_data
+from core.database import get_async_read_db
+from utils.auth import get_current_user, Principal
+from schemas.investment_schema import InvestmentListFilters
+from services.admin_dashboard_service import get_admin_dashboard_data_async
+from utils.response_cache import response_cache, DASHBOARD_ROUTE
 
 router = APIRouter(prefix="/admin", tags=["Admin Dashboard"])
 
 @router.get("/dashboard")
-def admin_dashboard(
+async def admin_dashboard(
     plan_type_id: int | None = None,
-    db: Session = Depends(get_db),
-    current_user: UserRegistration = Depends(get_current_user),
+    status: Literal["active", "completed", "inactive"] | None = None,
+    created_from: date | None = None,
+    created_to: date | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     # 🔐 ONLY ADMIN & SUPER ADMIN
     if current_user.role_id not in (2, 3):
         raise HTTPException(status_code=403, detail="Admin access required")
 
-    return get_admin_dashboard_data(
-        db=db,
-        plan_type_id=plan_type_id
+    filters = InvestmentListFilters(
+        plan_type_id=plan_type_id,
+        status=status,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
+    return await response_cache.get_or_compute_async(
+        DASHBOARD_ROUTE,
+        filters.model_dump(),
+        lambda: get_admin_dashboard_data_async(db=db, filters=filters),
+        role=current_user.role_id,
     )
@@ -1,70 +1,153 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from services.investment_service import get_my_investments
+from sqlalchemy.ext.asyncio import AsyncSession
+from services.investment_service import get_my_investments, my_investments_etag
 
 from fastapi import UploadFile, File, Form
 from datetime import date
+from typing import Literal
 from decimal import Decimal
 
 
-from core.database import get_db
-from schemas.investment_schema import InvestmentCreate, InvestmentUpdate
+from core.database import get_async_db, get_db, get_read_db
+from schemas.investment_schema import (
+    InvestmentCreate,
+    InvestmentListFilters,
+    MyInvestmentItem,
+    InvestmentUpdate,
+    UploadUrlRequest,
+    UploadUrlResponse,
+)
 
 
 
 from services.investment_service import (
     create_investment,
+    create_upload_url,
     get_all_investments,
+    stream_investments,
     get_investment_by_uk_inv_id,
+    get_investment_detail,
     # update_investment_by_uk_inv_id,
     delete_investment_by_uk_inv_id,
     get_status
 )
 
-from utils.auth import get_current_user
+from utils.auth import get_current_user, Principal
 #from utils.jwt import get_current_user   # ✅ FIXED
-from models.generated_models import UserRegistration
 
 router = APIRouter(
     prefix="/investments",
     tags=["Investments"]
 )
 
+# ---------------- DIRECT UPLOAD URL ----------------
+@router.post("/upload-url", response_model=UploadUrlResponse)
+def upload_url(
+    data: UploadUrlRequest,
+    current_user: Principal = Depends(get_current_user)
+):
+    return create_upload_url(current_user.id, data.filename, data.content_type)
+
+
 # ---------------- CREATE ----------------
 @router.post("/")
-def create(
+async def create(
     principal_amount: Decimal = Form(...),
     plan_type_id: int = Form(...),
     maturity_date: date = Form(...),
-    upload_file: UploadFile = File(...),
+    upload_file: UploadFile | None = File(None),
+    upload_token: str | None = Form(None),
     db: Session = Depends(get_db),
-    current_user: UserRegistration = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
+    if (upload_file is None) == (upload_token is None):
+        raise HTTPException(
+            status_code=400,
+            detail="Provide exactly one: upload_file or upload_token",
+        )
+
     payload = InvestmentCreate(
         principal_amount=principal_amount,
         plan_type_id=plan_type_id,
         maturity_date=maturity_date,
-        upload_file=upload_file
+        upload_file=upload_file,
+        upload_token=upload_token,
     )
 
-    return create_investment(db, payload, current_user.id)
+    return await create_investment(db, payload, current_user.id)
 
 # ---------------- GET ALL ----------------
+# Paged by ?after_id=<X-Next-Cursor of the previous page>.
+# ?stream=true returns every match as NDJSON instead (exports).
 @router.get("/")
 def get_all(
-    db: Session = Depends(get_db),
-    current_user: UserRegistration = Depends(get_current_user)
+    response: Response,
+    after_id: int | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    plan_type_id: int | None = None,
+    status: Literal["active", "completed", "inactive"] | None = None,
+    created_from: date | None = None,
+    created_to: date | None = None,
+    maturity_from: date | None = None,
+    maturity_to: date | None = None,
+    inv_reg_id: str | None = None,
+    stream: bool = False,
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return get_all_investments(db)
+    filters = InvestmentListFilters(
+        plan_type_id=plan_type_id,
+        status=status,
+        created_from=created_from,
+        created_to=created_to,
+        maturity_from=maturity_from,
+        maturity_to=maturity_to,
+        inv_reg_id=inv_reg_id,
+    )
+
+    if stream:
+        return StreamingResponse(
+            stream_investments(filters, after_id),
+            media_type="application/x-ndjson",
+        )
+
+    rows, next_cursor = get_all_investments(db, filters, after_id, limit)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return rows
 
 
 # ---------------- GET MY INVESTMENTS ----------------
-@router.get("/my")
-def get_my(
-    db: Session = Depends(get_db),
-    current_user: UserRegistration = Depends(get_current_user)
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # weak comparison (RFC 9110): ignore W/ prefixes; "*" matches anything
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+# Paged by ?after_id=<X-Next-Cursor>. Send the ETag back as
+# If-None-Match to get 304 Not Modified when nothing changed.
+@router.get("/my", response_model=list[MyInvestmentItem])
+async def get_my(
+    response: Response,
+    after_id: int | None = None,
+    limit: int = Query(50, ge=1, le=500),
+    if_none_match: str | None = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    return get_my_investments(db, current_user.id)
+    etag = await my_investments_etag(db, current_user.id, after_id, limit)
+
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    rows, next_cursor = await get_my_investments(db, current_user.id, after_id, limit)
+
+    response.headers["ETag"] = etag
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return rows
 
 
 # ---------------- READ ONE ----------------
@@ -73,13 +156,7 @@ def get_one(
     uk_inv_id: str,
     db: Session = Depends(get_db),
 ):
-    inv = get_investment_by_uk_inv_id(db, uk_inv_id)
-    return {
-        "created_by": inv.created_by,
-        "investment_id": inv.id,      # internal PK (optional)
-        "uk_inv_id": inv.uk_inv_id,
-        "status": get_status(inv)
-    }
+    return get_investment_detail(db, uk_inv_id)
 
 
 # # ---------------- UPDATE ----------------
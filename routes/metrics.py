@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from core.database import replicas
+from core.pool_metrics import pool_stats
+from utils.auth import auth_cache_stats, get_current_user, Principal
+from utils.email_outbox import email_outbox_stats
+from utils.hash_password import hashing_stats
+from utils.response_cache import response_cache_stats
+from utils.storage import storage_stats
+
+router = APIRouter(tags=["Metrics"])
+
+
+# In-process counters of THIS worker (each uvicorn worker has its own).
+# Plain def: email_outbox_stats() queries the outbox SQLite file, so this
+# runs in the threadpool instead of on the event loop.
+@router.get("/metrics")
+def metrics(current_user: Principal = Depends(get_current_user)):
+    # 🔐 ONLY ADMIN & SUPER ADMIN
+    if current_user.role_id not in (2, 3):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {
+        "db_pools": pool_stats(),
+        "db_replicas": replicas.stats(),
+        "response_cache": response_cache_stats(),
+        "auth_cache": auth_cache_stats(),
+        "password_hashing": hashing_stats(),
+        "email_outbox": email_outbox_stats(),
+        "storage": storage_stats(),
+    }
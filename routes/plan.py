@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.database import get_db
+from core.database import get_async_db, get_db
 from schemas.plan_schema import (
     PlanCreate,
     PlanUpdate,
     PlanResponse
 )
+from utils.response_cache import response_cache, PLANS_ROUTE
 from services.plan_service import (
     create_plan,
     get_all_plans,
@@ -24,8 +26,11 @@ def create(data: PlanCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/", response_model=list[PlanResponse])
-def list_all(db: Session = Depends(get_db)):
-    return get_all_plans(db)
+async def list_all(db: AsyncSession = Depends(get_async_db)):
+    async def compute():
+        return [PlanResponse.model_validate(p) for p in await get_all_plans(db)]
+
+    return await response_cache.get_or_compute_async(PLANS_ROUTE, {}, compute)
 
 
 @router.get("/{plan_id}", response_model=PlanResponse)
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
-from core.database import get_db
+from core.database import get_async_db, get_db, get_read_db
 
 from schemas.user_schema import (
     UserCreate,
@@ -20,6 +21,7 @@ from services.user_service import (
     login_user,
     get_all_users,
     get_user_by_inv_reg_id,
+    get_user_detail,
     update_user,
     delete_user,
 )
@@ -45,9 +47,8 @@ from services.bank_service import (
 )
 
 
-from utils.auth import get_current_user
+from utils.auth import get_current_user, Principal
 
-from models.generated_models import UserRegistration
 
 
 from schemas.user_schema import (
@@ -69,24 +70,24 @@ router = APIRouter(prefix="/users", tags=["Users"])
 # REGISTER (AUTO OTP)
 # =========================
 @router.post("/register")
-def register(data: UserCreate, db: Session = Depends(get_db)):
-    return register_user(db, data)
+async def register(data: UserCreate, db: Session = Depends(get_db)):
+    return await register_user(db, data)
 
 
 # =========================
 # VERIFY OTP
 # =========================
 @router.post("/verify-otp")
-def verify_otp(data: VerifyOTPRequest, db: Session = Depends(get_db)):
-    return verify_otp_service(db, data.email, data.otp)
+async def verify_otp(data: VerifyOTPRequest, db: Session = Depends(get_db)):
+    return await verify_otp_service(db, data.email, data.otp)
 
 
 # =========================
 # LOGIN
 # =========================
 @router.post("/login", response_model=LoginResponse)
-def login(data: UserLogin, db: Session = Depends(get_db)):
-    return login_user(db, data)
+async def login(data: UserLogin, db: Session = Depends(get_db)):
+    return await login_user(db, data)
 
 
 # -------------------------
@@ -104,11 +105,11 @@ def forgot_password(
 # RESET PASSWORD
 # -------------------------
 @router.post("/reset-password")
-def reset_password(
+async def reset_password(
     data: ResetPasswordRequest,
     db: Session = Depends(get_db),
 ):
-    return reset_password_service(
+    return await reset_password_service(
         db,
         token=data.token,
         new_password=data.new_password,
@@ -151,7 +152,7 @@ def refresh_token(token: str):
 def add_bank_details(
     data: BankDetailsCreate,
     db: Session = Depends(get_db),
-    current_user: UserRegistration = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
     return add_or_update_bank_details(
         db=db,
@@ -169,11 +170,12 @@ def add_bank_details(
 @router.get("/bank-details")
 def fetch_bank_details(
     db: Session = Depends(get_db),
-    current_user: UserRegistration = Depends(get_current_user),
+    read_db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_user),
 ):
     # Admin / SuperAdmin
     if current_user.role_id in (2, 3):
-        return get_all_bank_details(db)
+        return get_all_bank_details(read_db)
 
     # Investor
     return get_bank_details(db, current_user.id)
@@ -202,15 +204,25 @@ def fetch_bank_details(
 # =========================
 # CRUD OPERATIONS
 # =========================
+# Paged by ?after_id=<X-Next-Cursor of the previous page>.
 @router.get("/", response_model=List[UserDetailResponse])
-def list_users(db: Session = Depends(get_db)):
-    return get_all_users(db)
+def list_users(
+    response: Response,
+    after_id: int | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    role_id: int | None = None,
+    db: Session = Depends(get_read_db),
+):
+    rows, next_cursor = get_all_users(db, after_id, limit, role_id)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
+    return rows
 
 
 
-@router.get("/{inv_reg_id}", response_model=UserDetailBasicResponse)
-def get_user(inv_reg_id: str, db: Session = Depends(get_db)):
-    user = get_user_by_inv_reg_id(db, inv_reg_id)
+@router.get("/{inv_reg_id}", response_model=UserDetailResponse)
+async def get_user(inv_reg_id: str, db: AsyncSession = Depends(get_async_db)):
+    user = await get_user_detail(db, inv_reg_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
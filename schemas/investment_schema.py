@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from typing import Literal, Optional
 from decimal import Decimal
 import datetime  
 from fastapi import UploadFile
@@ -13,13 +13,30 @@ class InvestmentCreate(BaseModel):
     # uk_inv_id: str                 # bond id
     maturity_date: datetime.date
 
-    upload_file: UploadFile
+    # exactly one: multipart file, or token from POST /investments/upload-url
+    upload_file: Optional[UploadFile] = None
+    upload_token: Optional[str] = None
 
     # ⚠️ if you REALLY need client input (not recommended)
     # created_by: Optional[int] = None
     created_date: Optional[datetime.datetime] = None
 
 
+# ---------------- DIRECT UPLOAD ----------------
+class UploadUrlRequest(BaseModel):
+    filename: str
+    content_type: str
+
+
+class UploadUrlResponse(BaseModel):
+    key: str
+    url: str
+    fields: dict[str, str]
+    expires_in: int
+    max_bytes: int
+    upload_token: str
+
+
 # ---------------- UPDATE ----------------
 class InvestmentUpdate(BaseModel):
     principal_amount: Optional[Decimal] = None
@@ -28,6 +45,17 @@ class InvestmentUpdate(BaseModel):
     is_active: Optional[bool] = None
 
 
+# ---------------- LIST FILTERS ----------------
+class InvestmentListFilters(BaseModel):
+    plan_type_id: Optional[int] = None
+    status: Optional[Literal["active", "completed", "inactive"]] = None
+    created_from: Optional[datetime.date] = None
+    created_to: Optional[datetime.date] = None
+    maturity_from: Optional[datetime.date] = None
+    maturity_to: Optional[datetime.date] = None
+    inv_reg_id: Optional[str] = None          # investor
+
+
 # ---------------- RESPONSE ----------------
 class InvestmentResponse(BaseModel):
     customer_id: int
@@ -42,7 +70,28 @@ class InvestmentResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# ---------------- MY INVESTMENTS (LIST ITEM) ----------------
+class MyInvestmentItem(BaseModel):
+    id: int
+    uk_inv_id: str
+    plan_type_id: int
+    # float: same JSON numbers the untyped endpoint used to return
+    principal_amount: float
+    interest_amount: float
+    maturity_amount: float
+    maturity_date: datetime.date
+    created_date: Optional[datetime.datetime] = None
+    upload_file: Optional[str] = None
+    status: str
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 # ✅ model_rebuild MUST be OUTSIDE classes
 InvestmentCreate.model_rebuild()
 InvestmentUpdate.model_rebuild()
+UploadUrlRequest.model_rebuild()
+UploadUrlResponse.model_rebuild()
+InvestmentListFilters.model_rebuild()
 InvestmentResponse.model_rebuild()
+MyInvestmentItem.model_rebuild()
@@ -88,6 +88,10 @@ class UserDetailResponse(BaseModel):
     total_maturity_amount: Optional[Decimal] = None
     investment_created_date: Optional[datetime.datetime] = None
     investment_maturity_date: Optional[datetime.date] = None
+    active_investment_count: Optional[int] = None
+    active_principal_amount: Optional[Decimal] = None
+    completed_investment_count: Optional[int] = None
+    completed_principal_amount: Optional[Decimal] = None
 
     class Config:
         from_attributes = True
@@ -0,0 +1,136 @@
+"""
+Admin dashboard latency: the old four-query version vs the single
+CTE statement vs the rollup read, over a synthetic inv_config.
+
+Seeds --rows investments (uk_inv_id 'BENCH...') with generate_series, so
+it needs PostgreSQL. Use a SCRATCH database; --cleanup removes the rows.
+
+Usage:
+    python -m scripts.bench_dashboard --rows 1000000
+    python -m scripts.bench_dashboard --cleanup
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import func, text
+
+from core.database import SessionLocal, engine
+from models.generated_models import InvConfig, MasterPlanType, UserRegistration
+from schemas.investment_schema import InvestmentListFilters
+from services.admin_dashboard_service import get_admin_dashboard_data, get_admin_dashboard_live
+from services.dashboard_rollup_service import rebuild_rollup
+
+
+SEED_SQL = text("""
+    INSERT INTO inv_config (
+        principal_amount, plan_type_id, interest_amount, maturity_amount,
+        uk_inv_id, maturity_date, created_date, is_active
+    )
+    SELECT
+        p.amount,
+        (:plan_ids)[1 + g % cardinality(:plan_ids)],
+        p.amount / 10,
+        p.amount * 1.1,
+        'BENCH' || g,
+        current_date + (g % 1460 - 365),
+        now() - (g % 730) * interval '1 day',
+        g % 20 <> 0
+    FROM generate_series(1, :rows) AS g,
+         LATERAL (SELECT (1000 + g % 99000)::numeric(10, 2) AS amount) AS p
+""")
+
+
+def legacy_dashboard(db, plan_type_id=None):
+    """The pre-CTE implementation: four round trips."""
+    inv_query = db.query(InvConfig)
+    if plan_type_id:
+        inv_query = inv_query.filter(InvConfig.plan_type_id == plan_type_id)
+
+    total_investors = db.query(UserRegistration).filter(UserRegistration.role_id == 1).count()
+    active_investments = inv_query.filter(InvConfig.is_active == True).count()
+    totals = inv_query.with_entities(
+        func.coalesce(func.sum(InvConfig.principal_amount), 0),
+        func.coalesce(func.sum(InvConfig.interest_amount), 0),
+    ).first()
+    plan_distribution = (
+        db.query(MasterPlanType.id, MasterPlanType.plan_type, MasterPlanType.duration, func.count(InvConfig.id))
+        .join(InvConfig, InvConfig.plan_type_id == MasterPlanType.id)
+        .group_by(MasterPlanType.id, MasterPlanType.plan_type, MasterPlanType.duration)
+        .all()
+    )
+    return total_investors, active_investments, totals, plan_distribution
+
+
+def timed(fn, iterations: int) -> dict:
+    samples = []
+    db = SessionLocal()
+    try:
+        fn(db)  # warm-up
+        for _ in range(iterations):
+            start = time.perf_counter()
+            fn(db)
+            samples.append((time.perf_counter() - start) * 1000)
+            db.rollback()
+    finally:
+        db.close()
+
+    samples.sort()
+    return {
+        "median_ms": round(statistics.median(samples), 1),
+        "p95_ms": round(samples[int(0.95 * (len(samples) - 1))], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--plan-type-id", type=int, help="also time a plan-filtered dashboard")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse rows from a previous run")
+    parser.add_argument("--cleanup", action="store_true", help="delete the BENCH rows, rebuild the rollup and exit")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if args.cleanup:
+            deleted = conn.execute(text("DELETE FROM inv_config WHERE uk_inv_id LIKE 'BENCH%'")).rowcount
+            print(f"deleted {deleted} rows")
+
+        elif not args.skip_seed:
+            plan_ids = conn.execute(text("SELECT array_agg(id) FROM master_plan_type")).scalar()
+            if not plan_ids:
+                raise SystemExit("master_plan_type is empty: add at least one plan first")
+
+            start = time.perf_counter()
+            conn.execute(SEED_SQL, {"plan_ids": plan_ids, "rows": args.rows})
+            print(f"seeded {args.rows} rows in {time.perf_counter() - start:.1f}s")
+
+    # the seed bypasses the write hooks
+    db = SessionLocal()
+    try:
+        rebuild_rollup(db)
+        db.commit()
+    finally:
+        db.close()
+
+    if args.cleanup:
+        return
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE inv_config"))
+        conn.commit()
+
+    cases = [("all plans", None)]
+    if args.plan_type_id:
+        cases.append((f"plan {args.plan_type_id}", args.plan_type_id))
+
+    for label, plan_type_id in cases:
+        legacy = timed(lambda db: legacy_dashboard(db, plan_type_id), args.iterations)
+        filters = InvestmentListFilters(plan_type_id=plan_type_id)
+        single = timed(lambda db: get_admin_dashboard_live(db, filters), args.iterations)
+        rollup = timed(lambda db: get_admin_dashboard_data(db, filters), args.iterations)
+        print(f"{label:>12}  legacy 4 queries: {legacy}  single statement: {single}  rollup: {rollup}")
+
+
+if __name__ == "__main__":
+    main()
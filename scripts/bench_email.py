@@ -0,0 +1,81 @@
+"""
+Email send benchmark against the local SendGrid stand-in.
+
+Compares:
+  - per-message SendGridAPIClient (old path, new connection every send)
+  - pooled send_email (shared keep-alive session)
+  - send_bulk (personalizations batches)
+
+Usage:
+    python -m scripts.bench_email --messages 500 --latency-ms 20
+"""
+import argparse
+import os
+import time
+
+from scripts.sendgrid_standin import start_standin
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server, stats = start_standin(latency_ms=args.latency_ms)
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # utils.email reads its config at import time
+    os.environ["SENDGRID_API_HOST"] = host
+    os.environ.setdefault("SENDGRID_API_KEY", "bench-key")
+    os.environ.setdefault("SENDGRID_FROM_EMAIL", "bench@example.com")
+
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail
+    from utils.email import send_email, send_bulk
+
+    recipients = [f"user{i}@example.com" for i in range(args.messages)]
+
+    def run(label, fn):
+        before_conn = stats.connections
+        start = time.perf_counter()
+        requests_made = fn()
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:<28} {elapsed:>8.2f}s {args.messages / elapsed:>10.1f} msg/s "
+            f"{requests_made:>6} req {stats.connections - before_conn:>6} conn"
+        )
+
+    def legacy():
+        for to in recipients:
+            client = SendGridAPIClient(os.environ["SENDGRID_API_KEY"], host=host)
+            client.send(Mail(
+                from_email=os.environ["SENDGRID_FROM_EMAIL"],
+                to_emails=to,
+                subject="Benchmark",
+                plain_text_content="Hello",
+            ))
+        return len(recipients)
+
+    def pooled():
+        for to in recipients:
+            send_email(to_email=to, subject="Benchmark", body="Hello")
+        return len(recipients)
+
+    def bulk():
+        return send_bulk(
+            [{"email": to, "substitutions": {"-n-": i}} for i, to in enumerate(recipients)],
+            subject="Benchmark",
+            body="Hello -n-",
+        )
+
+    print(f"{'path':<28} {'time':>9} {'throughput':>14} {'calls':>10} {'new':>5}")
+    run("per-message client", legacy)
+    run("pooled send_email", pooled)
+    run("send_bulk", bulk)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Password hash cost benchmark.
+
+Measures hashes per second per core for each candidate setting, and the
+total across all cores, so login capacity can be sized for the hardware
+this runs on.
+
+Usage:
+    python -m scripts.bench_password_hash
+    python -m scripts.bench_password_hash --seconds 5 \
+        "bcrypt:rounds=12" "argon2:time_cost=3,memory_cost=65536,parallelism=1"
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.hash_password import (
+    build_crypt_context,
+    BCRYPT_ROUNDS,
+    ARGON2_TIME_COST,
+    ARGON2_MEMORY_COST,
+    ARGON2_PARALLELISM,
+)
+
+DEFAULT_CANDIDATES = [
+    "bcrypt:rounds=10",
+    "bcrypt:rounds=11",
+    f"bcrypt:rounds={BCRYPT_ROUNDS}",
+    "argon2:time_cost=2,memory_cost=19456,parallelism=1",
+    f"argon2:time_cost={ARGON2_TIME_COST},memory_cost={ARGON2_MEMORY_COST},"
+    f"parallelism={ARGON2_PARALLELISM}",
+]
+
+PARAM_NAMES = {
+    "bcrypt": {"rounds": "bcrypt_rounds"},
+    "argon2": {
+        "time_cost": "argon2_time_cost",
+        "memory_cost": "argon2_memory_cost",
+        "parallelism": "argon2_parallelism",
+    },
+}
+
+
+def parse_candidate(spec: str) -> dict:
+    scheme, _, params = spec.partition(":")
+    kwargs = {"scheme": scheme}
+
+    for pair in filter(None, params.split(",")):
+        key, _, value = pair.partition("=")
+        if key not in PARAM_NAMES.get(scheme, {}):
+            raise SystemExit(f"Unknown parameter '{key}' for {scheme}")
+        kwargs[PARAM_NAMES[scheme][key]] = int(value)
+
+    return kwargs
+
+
+def run_single_core(kwargs: dict, seconds: float) -> tuple[int, float]:
+    ctx = build_crypt_context(**kwargs)
+    ctx.hash("warm-up")
+
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        ctx.hash("correct horse battery staple")
+        count += 1
+
+    return count, time.perf_counter() - start
+
+
+def bench(spec: str, seconds: float, cores: int) -> dict:
+    kwargs = parse_candidate(spec)
+
+    count, elapsed = run_single_core(kwargs, seconds)
+    per_core = count / elapsed
+
+    with ProcessPoolExecutor(max_workers=cores) as pool:
+        results = list(pool.map(run_single_core, [kwargs] * cores, [seconds] * cores))
+    total = sum(c / e for c, e in results)
+
+    return {
+        "candidate": spec,
+        "ms_per_hash": 1000 / per_core,
+        "per_core": per_core,
+        "all_cores": total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("candidates", nargs="*", default=DEFAULT_CANDIDATES)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"cores={args.cores} seconds/candidate={args.seconds}\n")
+    print(f"{'candidate':<60} {'ms/hash':>9} {'hash/s/core':>12} {'hash/s total':>13}")
+
+    for spec in args.candidates:
+        r = bench(spec, args.seconds, args.cores)
+        print(
+            f"{r['candidate']:<60} {r['ms_per_hash']:>9.1f} "
+            f"{r['per_core']:>12.1f} {r['all_cores']:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Maintain the admin dashboard rollup (dashboard_rollup tables).
+
+    mature   move investments that matured since the last run from
+             active to completed (schedule daily, shortly after midnight)
+    rebuild  recompute the rollup from inv_config / user_registration
+    verify   compare the rollup with the base tables; exit 1 on mismatch
+
+Usage:
+    python -m scripts.dashboard_rollup mature
+    python -m scripts.dashboard_rollup rebuild
+    python -m scripts.dashboard_rollup verify
+"""
+import argparse
+
+from core.database import SessionLocal
+from services.dashboard_rollup_service import (
+    advance_maturities,
+    rebuild_rollup,
+    verify_rollup,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=["mature", "rebuild", "verify"])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "mature":
+            moved = advance_maturities(db)
+            db.commit()
+            print(f"moved {moved} matured investments to completed")
+
+        elif args.command == "rebuild":
+            rebuild_rollup(db)
+            db.commit()
+            print("rollup rebuilt")
+
+        else:
+            advance_maturities(db)
+            db.commit()
+
+            problems = verify_rollup(db)
+            db.rollback()
+            for problem in problems:
+                print(f"❌ {problem}")
+            print(f"rollup {'differs' if problems else 'matches'} ({len(problems)} differences)")
+            if problems:
+                raise SystemExit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Garbage-collect uploaded bond files that no investment references.
+
+References are InvConfig.upload_file values (soft-deleted investments
+still count). Blobs younger than --min-age-hours are skipped so uploads
+whose investment row is not committed yet are never removed; each blob
+is checked again (references, then age) right before it is deleted, and
+deleted blobs that gained a reference anyway are reported (exit 1).
+
+Usage:
+    python -m scripts.gc_uploads                 # dry run
+    python -m scripts.gc_uploads --delete
+"""
+import argparse
+import time
+
+from sqlalchemy import func
+
+from core.database import SessionLocal, release_connection
+from models.generated_models import InvConfig
+from utils.storage import iter_blobs, blob_modified_at, delete_blob
+
+
+def reference_counts(db) -> dict:
+    rows = (
+        db.query(InvConfig.upload_file, func.count(InvConfig.id))
+        .filter(InvConfig.upload_file.isnot(None))
+        .group_by(InvConfig.upload_file)
+        .all()
+    )
+    return dict(rows)
+
+
+def is_referenced(db, url: str) -> bool:
+    return db.query(InvConfig.id).filter(InvConfig.upload_file == url).first() is not None
+
+
+def still_garbage(db, url: str, cutoff: float) -> bool:
+    """
+    Re-check one candidate right before deleting it. A duplicate upload
+    touches the blob first and commits its InvConfig row after, so the
+    references are read first and the mtime after: a blob touched
+    before this check is caught by one of the two.
+    """
+    referenced = is_referenced(db, url)
+    # storage call next: don't keep the connection through it
+    release_connection(db)
+    if referenced:
+        return False
+
+    modified_at = blob_modified_at(url)
+    return modified_at is not None and modified_at < cutoff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--delete", action="store_true", help="actually remove blobs")
+    # The grace period is what keeps GC and deduplicating uploads apart:
+    # an upload touches the blob before committing its row, and each blob
+    # is re-checked right before deletion, but an upload landing between
+    # that check and the delete still loses its file (reported as "lost").
+    parser.add_argument("--min-age-hours", type=float, default=24,
+                        help="skip blobs modified more recently than this")
+    args = parser.parse_args()
+
+    cutoff = time.time() - args.min_age_hours * 3600
+
+    db = SessionLocal()
+    try:
+        refs = reference_counts(db)
+        release_connection(db)
+
+        candidates = [
+            url for url, modified_at in iter_blobs()
+            if url not in refs and modified_at < cutoff
+        ]
+
+        deleted = []
+        for url in candidates:
+            if args.delete:
+                if not still_garbage(db, url, cutoff):
+                    continue
+                delete_blob(url)
+                deleted.append(url)
+            print(("deleted " if args.delete else "unreferenced ") + url)
+
+        # an upload that deduplicated onto a blob between its last check
+        # and the delete has a row pointing at a missing file now
+        lost = [url for url in deleted if is_referenced(db, url)]
+    finally:
+        db.close()
+
+    for url in lost:
+        print(f"❌ {url} was referenced while being deleted: its investment needs the file re-uploaded")
+
+    print(
+        f"referenced blobs={len(refs)} references={sum(refs.values())} "
+        f"unreferenced={len(candidates)} deleted={len(deleted)} lost={len(lost)}"
+    )
+    if lost:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
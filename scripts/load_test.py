@@ -0,0 +1,127 @@
+"""
+Concurrency load test for a running API: N keep-alive connections
+hammer each path for --duration seconds, then throughput and latency
+percentiles are printed per path.
+
+Run the server with a fixed worker count so paths are compared on equal
+footing, e.g.:
+
+    uvicorn app.main:app --workers 1 --port 8000
+
+then compare an async read with a sync read of similar cost:
+
+    python -m scripts.load_test --token <access token> \\
+        --concurrency 200 /investments/my /investments/INV0001
+
+Plain asyncio HTTP/1.1, no client library needed.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ", 2)[1])
+
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status
+
+
+async def _client(host, port, request: bytes, deadline: float, latencies: list, errors: list):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(request)
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+            errors.append(type(exc).__name__)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_path(base_url: str, path: str, token: str, concurrency: int, duration: float) -> dict:
+    url = urlsplit(base_url)
+    host, port = url.hostname, url.port or 80
+
+    request = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {url.netloc}\r\n"
+        f"Authorization: Bearer {token}\r\n"
+        "Connection: keep-alive\r\n"
+        "\r\n"
+    ).encode()
+
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, request, deadline, latencies, errors) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {
+        "path": path,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "mean": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=["/investments/my", "/plans/"])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token", default=os.getenv("LOAD_TEST_TOKEN", ""),
+                        help="bearer access token (default: $LOAD_TEST_TOKEN)")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per path")
+    args = parser.parse_args()
+
+    print(f"{args.concurrency} connections, {args.duration:.0f}s per path against {args.base_url}")
+    print(f"{'path':<32} {'requests':>9} {'errors':>7} {'req/s':>8} {'mean ms':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for path in args.paths:
+        r = asyncio.run(run_path(args.base_url, path, args.token, args.concurrency, args.duration))
+        print(
+            f"{r['path']:<32} {r['requests']:>9} {r['errors']:>7} {r['rps']:>8.0f} "
+            f"{r['mean']:>8.1f} {r['p50']:>8.1f} {r['p95']:>8.1f} {r['p99']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
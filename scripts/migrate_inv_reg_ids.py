@@ -0,0 +1,88 @@
+"""
+Re-pad existing investor registration IDs to INV_REG_ID_WIDTH digits.
+
+Run after widening INV_REG_ID_WIDTH so old and new IDs sort together
+(I0042 -> I00000042). IDs not of the form I<digits> are reported and left
+alone. Login and lookups accept the old form too (inv_reg_id_matches),
+so Customer-IDs already emailed to investors keep working. Investor
+access tokens carry inv_reg_id as their subject, so renamed investors
+have to log in again once this is applied.
+
+Usage:
+    INV_REG_ID_WIDTH=8 python -m scripts.migrate_inv_reg_ids           # dry run
+    INV_REG_ID_WIDTH=8 python -m scripts.migrate_inv_reg_ids --apply
+"""
+import argparse
+from collections import defaultdict
+
+from core.database import SessionLocal
+from models.generated_models import IdAllocator, UserRegistration
+from services.user_service import INV_REG_ID_WIDTH, format_inv_reg_id
+
+
+def plan_renames(db, width: int):
+    rows = (
+        db.query(UserRegistration.id, UserRegistration.inv_reg_id)
+        .filter(UserRegistration.inv_reg_id.isnot(None))
+        .all()
+    )
+
+    renames, skipped = {}, []
+    by_number = defaultdict(list)
+    for user_id, inv_reg_id in rows:
+        if not (inv_reg_id.startswith("I") and inv_reg_id[1:].isdigit()):
+            skipped.append(inv_reg_id)
+            continue
+
+        number = int(inv_reg_id[1:])
+        by_number[number].append(inv_reg_id)
+
+        new_id = format_inv_reg_id(number, width)
+        if new_id != inv_reg_id:
+            renames[user_id] = (inv_reg_id, new_id)
+
+    clashes = {n: ids for n, ids in by_number.items() if len(ids) > 1}
+    return renames, skipped, clashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--apply", action="store_true", help="write the new IDs")
+    parser.add_argument("--width", type=int, default=INV_REG_ID_WIDTH)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        renames, skipped, clashes = plan_renames(db, args.width)
+
+        for old_id, new_id in renames.values():
+            print(f"{old_id} -> {new_id}")
+        for inv_reg_id in skipped:
+            print(f"skipped (not I<digits>): {inv_reg_id}")
+
+        if clashes:
+            for number, ids in sorted(clashes.items()):
+                print(f"❌ {', '.join(ids)} all map to {format_inv_reg_id(number, args.width)}")
+            raise SystemExit(1)
+
+        counter = db.get(IdAllocator, "inv_reg_id")
+        if counter and counter.next_value >= 10 ** args.width:
+            print(f"⚠️ allocator is at {counter.next_value}: new IDs are already wider than {args.width} digits")
+
+        if args.apply and renames:
+            for user_id, (_, new_id) in renames.items():
+                db.query(UserRegistration).filter(
+                    UserRegistration.id == user_id
+                ).update({UserRegistration.inv_reg_id: new_id}, synchronize_session=False)
+            db.commit()
+    finally:
+        db.close()
+
+    print(
+        f"width={args.width} renamed={len(renames) if args.apply else 0} "
+        f"pending={0 if args.apply else len(renames)} skipped={len(skipped)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Recompute user_portfolio_summary from inv_config, in batches of users.
+
+Each batch (--batch-size user ids) runs in its own short transaction
+holding the dashboard rollup lock, so investment writes only wait for
+one batch at a time. Prints how many summaries were corrected.
+
+Usage:
+    python -m scripts.reconcile_portfolios [--batch-size 1000]
+"""
+import argparse
+
+from sqlalchemy import func, select
+
+from core.database import SessionLocal
+from models.generated_models import InvConfig, UserPortfolioSummary
+from services.dashboard_rollup_service import lock_meta
+from services.portfolio_summary_service import rebuild_portfolio_range
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        highest = max(
+            db.execute(select(func.max(InvConfig.created_by))).scalar() or 0,
+            db.execute(select(func.max(UserPortfolioSummary.user_id))).scalar() or 0,
+        )
+        db.rollback()
+
+        changed = 0
+        for lo in range(0, highest + 1, args.batch_size):
+            hi = lo + args.batch_size - 1
+            matured_through = lock_meta(db, exclusive=True).matured_through
+            batch = rebuild_portfolio_range(db, matured_through, lo, hi)
+            db.commit()
+
+            if batch:
+                print(f"users {lo}-{hi}: corrected {batch}")
+            changed += batch
+    finally:
+        db.close()
+
+    print(f"checked user ids 0-{highest}, corrected {changed} summaries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Local HTTP stand-in for the SendGrid v3 mail API.
+
+Accepts POST /v3/mail/send, answers 202 like SendGrid, keeps the
+connection alive and counts messages, so email paths can be exercised
+and benchmarked offline.
+
+Usage:
+    python -m scripts.sendgrid_standin --port 8025 --latency-ms 50
+    SENDGRID_API_HOST=http://127.0.0.1:8025 uvicorn app.main:app
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StandinStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.recipients = 0
+        self.connections = 0
+
+
+def make_handler(stats: StandinStats, latency_ms: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def setup(self):
+            super().setup()
+            with stats.lock:
+                stats.connections += 1
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+
+            if self.path != "/v3/mail/send":
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+
+            with stats.lock:
+                stats.requests += 1
+                stats.recipients += sum(
+                    len(p.get("to", [])) for p in payload.get("personalizations", [])
+                )
+
+            self.send_response(202)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_standin(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 0):
+    """
+    Start the stand-in on a background thread.
+    Returns (server, stats); server.server_address has the bound port.
+    """
+    stats = StandinStats()
+    server = ThreadingHTTPServer((host, port), make_handler(stats, latency_ms))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    server, stats = start_standin(args.host, args.port, args.latency_ms)
+    print(f"SendGrid stand-in on http://{args.host}:{server.server_address[1]}")
+
+    try:
+        while True:
+            time.sleep(10)
+            print(
+                f"requests={stats.requests} recipients={stats.recipients} "
+                f"connections={stats.connections}"
+            )
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
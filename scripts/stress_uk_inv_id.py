@@ -0,0 +1,90 @@
+"""
+Concurrency check for uk_inv_id allocation.
+
+Creates investments from many processes x threads at once and verifies
+no uk_inv_id was handed out twice. Writes real inv_config rows: run it
+against a SCRATCH database only.
+
+Usage:
+    DATABASE_URL=postgresql://.../scratch python -m scripts.stress_uk_inv_id \
+        --processes 4 --threads 8 --per-thread 100 --plan-type-id 1
+"""
+import argparse
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from decimal import Decimal
+
+
+def _create_many(plan_type_id: int, count: int) -> tuple[list[str], int]:
+    from sqlalchemy.exc import IntegrityError
+
+    from core.database import SessionLocal
+    from models.generated_models import InvConfig
+    from services.investment_service import generate_uk_inv_id
+
+    ids, conflicts = [], 0
+    db = SessionLocal()
+    try:
+        for _ in range(count):
+            uk_inv_id = generate_uk_inv_id()
+            db.add(InvConfig(
+                principal_amount=Decimal("1000"),
+                plan_type_id=plan_type_id,
+                interest_amount=Decimal("100"),
+                maturity_amount=Decimal("1100"),
+                maturity_date=datetime.date.today() + datetime.timedelta(days=365),
+                uk_inv_id=uk_inv_id,
+                is_active=True,
+            ))
+            try:
+                db.commit()
+                ids.append(uk_inv_id)
+            except IntegrityError:
+                db.rollback()
+                conflicts += 1
+    finally:
+        db.close()
+
+    return ids, conflicts
+
+
+def _process(plan_type_id: int, threads: int, per_thread: int) -> tuple[list[str], int]:
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(_create_many, [plan_type_id] * threads, [per_thread] * threads))
+
+    return (
+        [i for ids, _ in results for i in ids],
+        sum(conflicts for _, conflicts in results),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--per-thread", type=int, default=100)
+    parser.add_argument("--plan-type-id", type=int, required=True)
+    args = parser.parse_args()
+
+    # spawn: every worker gets its own engine and allocator, like uvicorn workers
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.processes, mp_context=ctx) as pool:
+        results = list(pool.map(
+            _process,
+            [args.plan_type_id] * args.processes,
+            [args.threads] * args.processes,
+            [args.per_thread] * args.processes,
+        ))
+
+    ids = [i for chunk, _ in results for i in chunk]
+    conflicts = sum(c for _, c in results)
+    duplicates = len(ids) - len(set(ids))
+
+    print(f"created={len(ids)} unique={len(set(ids))} duplicates={duplicates} conflicts={conflicts}")
+    if duplicates or conflicts:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,206 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, true
 
 from models.generated_models import (
     UserRegistration,
     InvConfig,
-    MasterPlanType
+    MasterPlanType,
+    DashboardRollup,
+    DashboardRollupMeta,
 )
+from schemas.investment_schema import InvestmentListFilters
+from services.investment_service import apply_investment_filters, status_case
+from services.dashboard_rollup_service import ROLLUP_META_ID, rollup_is_current
+
+
+DASHBOARD_FILTERS = {"plan_type_id", "status", "created_from", "created_to"}
+
 
 # --------------------------------------------------
-# ADMIN DASHBOARD DATA (PLAN-BASED)
+# ADMIN DASHBOARD QUERY (ONE ROUND TRIP)
 # --------------------------------------------------
-def get_admin_dashboard_data(
-    db: Session,
-    plan_type_id: int | None = None
-):
-    # -----------------------------
-    # BASE INVESTMENT QUERY
-    # -----------------------------
-    inv_query = db.query(InvConfig)
-
-    if plan_type_id:
-        inv_query = inv_query.filter(
-            InvConfig.plan_type_id == plan_type_id
+# inv       : filtered investments with their status
+# per_plan  : counts and sums per plan in a single pass over inv
+#             (conditional aggregates: COUNT(*) FILTER (WHERE ...))
+# investors : investor count
+#
+# One row per plan comes back, each carrying the investor count; the
+# headline totals are the sum of the plan rows.
+def _dashboard_query(filters: InvestmentListFilters):
+    inv = apply_investment_filters(
+        select(
+            InvConfig.plan_type_id,
+            InvConfig.principal_amount,
+            InvConfig.interest_amount,
+            status_case().label("status"),
+        ),
+        filters,
+    ).cte("inv")
+
+    per_plan = (
+        select(
+            inv.c.plan_type_id,
+            func.count().label("investment_count"),
+            func.count().filter(inv.c.status == "active").label("active_count"),
+            func.coalesce(func.sum(inv.c.principal_amount), 0).label("total_principal"),
+            func.coalesce(func.sum(inv.c.interest_amount), 0).label("total_interest"),
         )
+        .group_by(inv.c.plan_type_id)
+        .cte("per_plan")
+    )
+
+    investors = (
+        select(func.count().label("investor_count"))
+        .where(UserRegistration.role_id == 1)
+        .cte("investors")
+    )
 
-    # -----------------------------
-    # KPI METRICS
-    # -----------------------------
-    total_investors = db.query(UserRegistration).filter(
-        UserRegistration.role_id == 1
-    ).count()
-
-    active_investments = inv_query.filter(
-        InvConfig.is_active == True
-    ).count()
-
-    totals = inv_query.with_entities(
-        func.coalesce(func.sum(InvConfig.principal_amount), 0),
-        func.coalesce(func.sum(InvConfig.interest_amount), 0)
-    ).first()
-
-    total_invested = totals[0]
-    interest_payable = totals[1]
-
-    # -----------------------------
-    # PLAN / TENURE DISTRIBUTION
-    # -----------------------------
-    plan_distribution = (
-        db.query(
-            MasterPlanType.id,
+    return (
+        select(
+            investors.c.investor_count,
+            per_plan.c.plan_type_id,
             MasterPlanType.plan_type,
             MasterPlanType.duration,
-            func.count(InvConfig.id)
+            per_plan.c.investment_count,
+            per_plan.c.active_count,
+            per_plan.c.total_principal,
+            per_plan.c.total_interest,
         )
-        .join(InvConfig, InvConfig.plan_type_id == MasterPlanType.id)
-        .group_by(
-            MasterPlanType.id,
+        .select_from(investors)
+        .outerjoin(per_plan, true())
+        .outerjoin(MasterPlanType, MasterPlanType.id == per_plan.c.plan_type_id)
+        .order_by(per_plan.c.plan_type_id)
+    )
+
+
+# --------------------------------------------------
+# ROLLUP QUERY
+# --------------------------------------------------
+# Same filters and output as _dashboard_query, read from
+# dashboard_rollup (a few rows per plan per day) instead of inv_config.
+def _rollup_query(filters: InvestmentListFilters):
+    stmt = (
+        select(
+            DashboardRollup.plan_type_id,
             MasterPlanType.plan_type,
-            MasterPlanType.duration
+            MasterPlanType.duration,
+            func.sum(DashboardRollup.investment_count).label("investment_count"),
+            func.coalesce(
+                func.sum(DashboardRollup.investment_count).filter(DashboardRollup.status == "active"), 0
+            ).label("active_count"),
+            func.sum(DashboardRollup.total_principal).label("total_principal"),
+            func.sum(DashboardRollup.total_interest).label("total_interest"),
         )
-        .all()
+        .outerjoin(MasterPlanType, MasterPlanType.id == DashboardRollup.plan_type_id)
+        .group_by(DashboardRollup.plan_type_id, MasterPlanType.plan_type, MasterPlanType.duration)
+        .having(func.sum(DashboardRollup.investment_count) > 0)
+        .order_by(DashboardRollup.plan_type_id)
     )
 
+    if filters.plan_type_id is not None:
+        stmt = stmt.where(DashboardRollup.plan_type_id == filters.plan_type_id)
+    if filters.status is not None:
+        stmt = stmt.where(DashboardRollup.status == filters.status)
+    if filters.created_from is not None:
+        stmt = stmt.where(DashboardRollup.day >= filters.created_from)
+    if filters.created_to is not None:
+        stmt = stmt.where(DashboardRollup.day <= filters.created_to)
+
+    return stmt
+
+
+def _dashboard_response(investor_count: int, plans, filters: InvestmentListFilters):
     plan_data = [
         {
-            "plan_type_id": pid,
-            "plan_type": plan,
-            "duration": duration,
-            "investment_count": count
+            "plan_type_id": r.plan_type_id,
+            "plan_type": r.plan_type,
+            "duration": r.duration,
+            "investment_count": int(r.investment_count),
+            "active_count": int(r.active_count),
+            "total_principal": float(r.total_principal),
+            "total_interest": float(r.total_interest),
         }
-        for pid, plan, duration, count in plan_distribution
+        for r in plans
     ]
 
     return {
         "summary": {
-            "total_investors": total_investors,
-            "active_investments": active_investments,
-            "total_invested": float(total_invested),
-            "interest_payable": float(interest_payable),
+            "total_investors": investor_count,
+            # not deactivated AND not yet matured
+            "active_investments": int(sum(r.active_count for r in plans)),
+            "total_invested": float(sum(r.total_principal for r in plans)),
+            "interest_payable": float(sum(r.total_interest for r in plans)),
         },
         "plan_distribution": plan_data,
-        "filters": {
-            "plan_type_id": plan_type_id
-        }
+        "filters": filters.model_dump(mode="json", include=DASHBOARD_FILTERS)
     }
+
+
+def _live_response(rows, filters: InvestmentListFilters):
+    # investors LEFT JOIN per_plan: always at least one row;
+    # plan_type_id is NULL when no investment matched
+    plans = [r for r in rows if r.plan_type_id is not None]
+
+    return _dashboard_response(rows[0].investor_count, plans, filters)
+
+
+def _rollup_meta_query():
+    return select(
+        DashboardRollupMeta.investor_count,
+        DashboardRollupMeta.matured_through,
+    ).where(DashboardRollupMeta.id == ROLLUP_META_ID)
+
+
+def _warn_stale_rollup():
+    print("⚠️ Dashboard rollup not current, serving live totals: "
+          "run python -m scripts.dashboard_rollup mature (or rebuild)")
+
+
+# --------------------------------------------------
+# ADMIN DASHBOARD DATA (PLAN-BASED)
+# --------------------------------------------------
+# Read only (may run on a replica): served from the rollup once the daily
+# job has brought it up to date, computed live from inv_config otherwise.
+def get_admin_dashboard_data(
+    db: Session,
+    filters: InvestmentListFilters | None = None
+):
+    filters = filters or InvestmentListFilters()
+
+    meta = db.execute(_rollup_meta_query()).first()
+    if meta is None or not rollup_is_current(meta.matured_through):
+        _warn_stale_rollup()
+        return get_admin_dashboard_live(db, filters)
+
+    plans = db.execute(_rollup_query(filters)).all()
+
+    return _dashboard_response(meta.investor_count, plans, filters)
+
+
+async def get_admin_dashboard_data_async(
+    db: AsyncSession,
+    filters: InvestmentListFilters | None = None
+):
+    """get_admin_dashboard_data for the async route."""
+    filters = filters or InvestmentListFilters()
+
+    meta = (await db.execute(_rollup_meta_query())).first()
+    if meta is None or not rollup_is_current(meta.matured_through):
+        _warn_stale_rollup()
+        rows = (await db.execute(_dashboard_query(filters))).all()
+        return _live_response(rows, filters)
+
+    plans = (await db.execute(_rollup_query(filters))).all()
+
+    return _dashboard_response(meta.investor_count, plans, filters)
+
+
+def get_admin_dashboard_live(
+    db: Session,
+    filters: InvestmentListFilters | None = None
+):
+    """Same result computed from inv_config directly (no rollup)."""
+    filters = filters or InvestmentListFilters()
+
+    return _live_response(db.execute(_dashboard_query(filters)).all(), filters)
@@ -0,0 +1,289 @@
+import datetime
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Date, and_, case, delete, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from core.database import dialect_insert
+from services.portfolio_summary_service import (
+    advance_portfolio_maturities,
+    rebuild_portfolio_range,
+)
+from models.generated_models import (
+    DashboardRollup,
+    DashboardRollupMeta,
+    InvConfig,
+    UserRegistration,
+)
+
+# --------------------------------------------------
+# DASHBOARD ROLLUP
+# --------------------------------------------------
+# dashboard_rollup keeps one row per (plan_type_id, created day, status)
+# with the investment count and principal / interest / maturity sums.
+# dashboard_rollup_meta (single row) holds the investor count and
+# matured_through: every non-inactive investment with maturity_date <=
+# matured_through is counted as "completed", the rest as "active".
+#
+# Writers update the rollup in the same transaction as the base row.
+# advance_maturities() moves newly matured investments from active to
+# completed once a day; rebuild_rollup() recomputes everything. Both run
+# from scripts/dashboard_rollup.py, never from a request: until the
+# daily job has run, the dashboard is computed live (rollup_is_current).
+#
+# Locking on the meta row (PostgreSQL): writers take FOR KEY SHARE, so
+# they never block each other; advance / rebuild take FOR UPDATE, so they
+# wait for in-flight writers and always see their rows.
+
+ROLLUP_META_ID = 1
+UNKNOWN_DAY = datetime.date(1970, 1, 1)      # investments without created_date
+
+_PK = ("plan_type_id", "day", "status")
+_SUMS = ("investment_count", "total_principal", "total_interest", "total_maturity")
+
+
+def _day_expr():
+    return func.coalesce(func.date(InvConfig.created_date, type_=Date()), UNKNOWN_DAY)
+
+
+def _day(inv: InvConfig) -> datetime.date:
+    return inv.created_date.date() if inv.created_date else UNKNOWN_DAY
+
+
+def _not_inactive():
+    # is_active is nullable; NULL counts as not inactive
+    return or_(InvConfig.is_active == True, InvConfig.is_active.is_(None))
+
+
+def lock_meta(db: Session, exclusive: bool = False):
+    stmt = select(
+        DashboardRollupMeta.investor_count,
+        DashboardRollupMeta.matured_through,
+    ).where(DashboardRollupMeta.id == ROLLUP_META_ID)
+
+    if exclusive:
+        stmt = stmt.with_for_update()
+    else:
+        stmt = stmt.with_for_update(read=True, key_share=True)
+
+    row = db.execute(stmt).first()
+    if row is None:
+        db.execute(
+            dialect_insert(db)(DashboardRollupMeta)
+            .values(id=ROLLUP_META_ID, investor_count=0, matured_through=None)
+            .on_conflict_do_nothing(index_elements=["id"])
+        )
+        row = db.execute(stmt).first()
+    return row
+
+
+def rollup_status(is_active: Optional[bool], maturity_date: datetime.date, matured_through: Optional[datetime.date]) -> str:
+    if is_active is False:
+        return "inactive"
+    if matured_through is not None and maturity_date <= matured_through:
+        return "completed"
+    return "active"
+
+
+def _bump(db: Session, plan_type_id: int, day: datetime.date, status: str, count: int,
+          principal: Decimal, interest: Decimal, maturity: Decimal):
+    stmt = dialect_insert(db)(DashboardRollup).values(
+        plan_type_id=plan_type_id,
+        day=day,
+        status=status,
+        investment_count=count,
+        total_principal=principal,
+        total_interest=interest,
+        total_maturity=maturity,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(_PK),
+        set_={
+            col: getattr(DashboardRollup, col) + getattr(stmt.excluded, col)
+            for col in _SUMS
+        },
+    )
+    db.execute(stmt)
+
+
+def _bump_investment(db: Session, inv: InvConfig, status: str, sign: int):
+    _bump(
+        db, inv.plan_type_id, _day(inv), status, sign,
+        sign * inv.principal_amount, sign * inv.interest_amount, sign * inv.maturity_amount,
+    )
+
+
+# ---------------- WRITE HOOKS (caller commits) ----------------
+
+def record_investment_created(db: Session, inv: InvConfig) -> str:
+    """
+    Call after the new InvConfig is flushed, before commit.
+    Returns the status the investment was counted under.
+    """
+    meta = lock_meta(db)
+    status = rollup_status(inv.is_active, inv.maturity_date, meta.matured_through)
+    _bump_investment(db, inv, status, +1)
+    return status
+
+
+def record_investment_deactivated(db: Session, inv: InvConfig) -> Optional[str]:
+    """
+    Call before is_active=False is flushed.
+    Returns the status it was counted under (None if already inactive).
+    """
+    if inv.is_active is False:
+        return None
+
+    meta = lock_meta(db)
+    status = rollup_status(inv.is_active, inv.maturity_date, meta.matured_through)
+    _bump_investment(db, inv, status, -1)
+    _bump_investment(db, inv, "inactive", +1)
+    return status
+
+
+def record_investor_change(db: Session, delta: int):
+    lock_meta(db)
+    db.execute(
+        update(DashboardRollupMeta)
+        .where(DashboardRollupMeta.id == ROLLUP_META_ID)
+        .values(investor_count=DashboardRollupMeta.investor_count + delta)
+    )
+
+
+# ---------------- MAINTENANCE ----------------
+
+def _base_rows(matured_through: datetime.date):
+    status = case(
+        (InvConfig.is_active == False, "inactive"),
+        (InvConfig.maturity_date <= matured_through, "completed"),
+        else_="active",
+    )
+    day = _day_expr()
+    return (
+        select(
+            InvConfig.plan_type_id,
+            day.label("day"),
+            status.label("status"),
+            func.count().label("investment_count"),
+            func.sum(InvConfig.principal_amount).label("total_principal"),
+            func.sum(InvConfig.interest_amount).label("total_interest"),
+            func.sum(InvConfig.maturity_amount).label("total_maturity"),
+        )
+        # by label: the expressions carry bind parameters
+        .group_by(InvConfig.plan_type_id, "day", "status")
+    )
+
+
+def _investor_count(db: Session) -> int:
+    return db.execute(
+        select(func.count()).select_from(UserRegistration).where(UserRegistration.role_id == 1)
+    ).scalar()
+
+
+def rebuild_rollup(db: Session, today: Optional[datetime.date] = None):
+    """Recompute the whole rollup from the base tables (caller commits)."""
+    matured_through = (today or datetime.date.today()) - datetime.timedelta(days=1)
+
+    previous = lock_meta(db, exclusive=True).matured_through
+    db.execute(delete(DashboardRollup))
+    db.execute(
+        dialect_insert(db)(DashboardRollup).from_select(_PK + _SUMS, _base_rows(matured_through))
+    )
+    db.execute(
+        update(DashboardRollupMeta)
+        .where(DashboardRollupMeta.id == ROLLUP_META_ID)
+        .values(investor_count=_investor_count(db), matured_through=matured_through)
+    )
+
+    # portfolio splits follow the same matured_through
+    if previous is not None and previous < matured_through:
+        advance_portfolio_maturities(db, previous, matured_through)
+    elif previous != matured_through:
+        rebuild_portfolio_range(db, matured_through)
+
+
+def advance_maturities(db: Session, today: Optional[datetime.date] = None) -> int:
+    """
+    Move investments that matured since the last run from active to
+    completed (caller commits). Returns how many moved; rebuilds instead
+    if the rollup was never built.
+    """
+    matured_through = (today or datetime.date.today()) - datetime.timedelta(days=1)
+
+    meta = lock_meta(db, exclusive=True)
+    if meta.matured_through is None:
+        rebuild_rollup(db, today)
+        return 0
+    if meta.matured_through >= matured_through:
+        return 0
+
+    day = _day_expr()
+    rows = db.execute(
+        select(
+            InvConfig.plan_type_id,
+            day.label("day"),
+            func.count().label("investment_count"),
+            func.sum(InvConfig.principal_amount).label("total_principal"),
+            func.sum(InvConfig.interest_amount).label("total_interest"),
+            func.sum(InvConfig.maturity_amount).label("total_maturity"),
+        )
+        .where(and_(
+            _not_inactive(),
+            InvConfig.maturity_date > meta.matured_through,
+            InvConfig.maturity_date <= matured_through,
+        ))
+        .group_by(InvConfig.plan_type_id, "day")
+    ).all()
+
+    for r in rows:
+        for status, sign in (("active", -1), ("completed", +1)):
+            _bump(
+                db, r.plan_type_id, r.day, status, sign * r.investment_count,
+                sign * r.total_principal, sign * r.total_interest, sign * r.total_maturity,
+            )
+    advance_portfolio_maturities(db, meta.matured_through, matured_through)
+
+    db.execute(
+        update(DashboardRollupMeta)
+        .where(DashboardRollupMeta.id == ROLLUP_META_ID)
+        .values(matured_through=matured_through)
+    )
+    return sum(r.investment_count for r in rows)
+
+
+def rollup_is_current(matured_through: Optional[datetime.date], today: Optional[datetime.date] = None) -> bool:
+    """
+    True once the daily job (advance_maturities) has run for today.
+    Readers only check this; catching up is left to that job.
+    """
+    today = today or datetime.date.today()
+    return matured_through is not None and matured_through >= today - datetime.timedelta(days=1)
+
+
+def verify_rollup(db: Session) -> list[str]:
+    """Compare the rollup with the base tables; returns the differences."""
+    meta = lock_meta(db, exclusive=True)
+    if meta.matured_through is None:
+        return ["rollup was never built"]
+
+    def as_dict(rows):
+        return {
+            (r.plan_type_id, r.day, r.status): tuple(getattr(r, col) for col in _SUMS)
+            for r in rows
+            if r.investment_count
+        }
+
+    expected = as_dict(db.execute(_base_rows(meta.matured_through)).all())
+    actual = as_dict(db.execute(select(DashboardRollup)).scalars().all())
+
+    problems = []
+    for key in sorted(expected.keys() | actual.keys(), key=str):
+        if expected.get(key) != actual.get(key):
+            problems.append(f"{key}: expected {expected.get(key)} rollup {actual.get(key)}")
+
+    investors = _investor_count(db)
+    if investors != meta.investor_count:
+        problems.append(f"investor_count: expected {investors} rollup {meta.investor_count}")
+
+    return problems
@@ -0,0 +1,70 @@
+import os
+import threading
+from typing import Callable
+
+from sqlalchemy import insert, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import IntegrityError
+
+from core.database import engine
+from models.generated_models import IdAllocator
+
+# --------------------------------------------------
+# HI-LO ID ALLOCATOR
+# --------------------------------------------------
+# id_allocator holds one counter row per name. A worker reserves a block
+# of ID_BLOCK_SIZE values with a single UPDATE ... RETURNING in its own
+# short transaction, then hands them out from memory. The row lock makes
+# reservations unique across workers and nodes. Values of a block still
+# unused when the process exits are skipped (gaps, never duplicates).
+
+ID_BLOCK_SIZE = int(os.getenv("ID_BLOCK_SIZE", "50"))
+
+
+def _reserve_block(name: str, size: int, seed: Callable[[Connection], int]) -> int:
+    """
+    Reserve `size` consecutive values and return the first one.
+    `seed` gives the first value when the counter row does not exist yet.
+    """
+    stmt = (
+        update(IdAllocator)
+        .where(IdAllocator.name == name)
+        .values(next_value=IdAllocator.next_value + size)
+        .returning(IdAllocator.next_value)
+    )
+
+    with engine.begin() as conn:
+        next_value = conn.execute(stmt).scalar()
+
+        if next_value is None:
+            try:
+                with conn.begin_nested():
+                    conn.execute(
+                        insert(IdAllocator).values(name=name, next_value=seed(conn))
+                    )
+            except IntegrityError:
+                pass  # another worker seeded it first
+
+            next_value = conn.execute(stmt).scalar()
+
+    return next_value - size
+
+
+class HiLoAllocator:
+    def __init__(self, name: str, seed: Callable[[Connection], int], block_size: int = ID_BLOCK_SIZE):
+        self.name = name
+        self.seed = seed
+        self.block_size = block_size
+        self._next = 0
+        self._limit = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> int:
+        with self._lock:
+            if self._next >= self._limit:
+                self._next = _reserve_block(self.name, self.block_size, self.seed)
+                self._limit = self._next + self.block_size
+
+            value = self._next
+            self._next += 1
+            return value
@@ -1,13 +1,40 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, case, func, or_, select, text
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 from decimal import Decimal, InvalidOperation
+from typing import Optional
 import datetime
+import hashlib
+import json
+import os
+
+from core.database import ReadSessionLocal, no_db_held, release_connection
 
 from models.generated_models import InvConfig, MasterPlanType, UserRegistration
+from services.id_allocator_service import HiLoAllocator
+from services.dashboard_rollup_service import (
+    record_investment_created,
+    record_investment_deactivated,
+)
+from services.portfolio_summary_service import (
+    record_portfolio_investment,
+    record_portfolio_deactivation,
+)
 from services.email_templates import investment_created_email
-from utils.email import send_email
-from utils.storage import store_file
+from services.user_service import inv_reg_id_matches
+from schemas.investment_schema import InvestmentListFilters
+from utils.email_outbox import enqueue_email
+from utils.response_cache import response_cache, DASHBOARD_ROUTE
+from utils.storage import (
+    store_file,
+    StoredFile,
+    create_presigned_upload,
+    resolve_direct_upload,
+)
+from utils.jwt import create_upload_token, SECRET_KEY, ALGORITHM
+from jose import jwt, JWTError
 
 
 
@@ -31,6 +58,17 @@ def calculate_interest(amount: Decimal, percentage: Decimal) -> Decimal:
     return (amount * percentage) / Decimal(100)
 
 
+# ---------------- STATUS ----------------
+# inactive  : is_active is false
+# completed : not inactive, maturity_date < today
+# active    : not inactive, maturity_date >= today
+#
+# get_status applies the rule to a loaded row; status_case / status_filter
+# are the same rule in SQL, so the database can filter, count and sort by
+# status. status_filter only uses "=", "IS NULL" and ranges on
+# (is_active, maturity_date), which ix_inv_config_is_active_maturity_date
+# turns into index range scans.
+
 def get_status(inv: InvConfig) -> str:
     today = datetime.date.today()
 
@@ -41,40 +79,96 @@ def get_status(inv: InvConfig) -> str:
     return "active"
 
 
-def generate_uk_inv_id(db: Session) -> str:
-    last = db.query(InvConfig).order_by(InvConfig.id.desc()).first()
+def status_case(today: Optional[datetime.date] = None):
+    today = today or datetime.date.today()
+    return case(
+        (InvConfig.is_active == False, "inactive"),
+        (InvConfig.maturity_date < today, "completed"),
+        else_="active",
+    )
+
 
-    if not last or not last.uk_inv_id:
-        return "INV0001"
+def status_filter(status: str, today: Optional[datetime.date] = None):
+    today = today or datetime.date.today()
 
-    digits = "".join(filter(str.isdigit, last.uk_inv_id))
+    if status == "inactive":
+        return InvConfig.is_active == False
 
-    if not digits:
-        return "INV0001"
+    # is_active is nullable; NULL counts as not inactive
+    not_inactive = or_(InvConfig.is_active == True, InvConfig.is_active.is_(None))
+    if status == "completed":
+        return and_(not_inactive, InvConfig.maturity_date < today)
+    return and_(not_inactive, InvConfig.maturity_date >= today)
 
-    num = int(digits)
-    return f"INV{num + 1:04d}"
 
+def _seed_uk_inv_id(conn) -> int:
+    # runs once, when the counter row is first created:
+    # continue after the highest existing INV number
+    highest = 0
+    for (uk_inv_id,) in conn.execute(select(InvConfig.uk_inv_id)):
+        digits = "".join(filter(str.isdigit, uk_inv_id or ""))
+        if digits:
+            highest = max(highest, int(digits))
+    return highest + 1
 
 
-# ---------------- CREATE ----------------
+_uk_inv_id_allocator = HiLoAllocator("uk_inv_id", _seed_uk_inv_id)
+
 
-def create_investment(db: Session, data, user_id: int):
+def generate_uk_inv_id() -> str:
+    return f"INV{_uk_inv_id_allocator.next():04d}"
+
+
+
+# ---------------- DIRECT UPLOAD ----------------
+
+def create_upload_url(user_id: int, filename: str, content_type: str):
+    presigned = create_presigned_upload(filename, content_type)
+
+    # token outlives the presigned URL so a slow upload can still be submitted
+    presigned["upload_token"] = create_upload_token(
+        user_id, presigned["key"], presigned["expires_in"] + 3600
+    )
+    return presigned
 
+
+def _upload_key_from_token(token: str, user_id: int) -> str:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=400, detail="Invalid or expired upload token")
+
+    if payload.get("type") != "upload" or payload.get("sub") != str(user_id):
+        raise HTTPException(status_code=400, detail="Invalid upload token")
+
+    return payload["key"]
+
+
+# ---------------- CREATE ----------------
+
+def _get_active_plan(db: Session, plan_type_id: int) -> MasterPlanType:
     plan = db.query(MasterPlanType).filter(
-        MasterPlanType.id == data.plan_type_id,
+        MasterPlanType.id == plan_type_id,
         MasterPlanType.is_active == True
     ).first()
 
     if not plan:
         raise HTTPException(status_code=400, detail="Invalid plan type")
 
-    percentage = parse_percentage(plan.percentage)
-    interest = calculate_interest(data.principal_amount, percentage)
-    maturity_amount = data.principal_amount + interest
+    # the upload comes next: don't keep the connection through it
+    release_connection(db)
+    return plan
 
-    uk_inv_id = generate_uk_inv_id(db)
-    file_url = store_file(data.upload_file)
+
+def _save_investment(
+    db: Session,
+    data,
+    user_id: int,
+    interest: Decimal,
+    maturity_amount: Decimal,
+    stored: StoredFile,
+) -> InvConfig:
+    uk_inv_id = generate_uk_inv_id()
 
     inv = InvConfig(
         principal_amount=data.principal_amount,
@@ -83,20 +177,33 @@ def create_investment(db: Session, data, user_id: int):
         maturity_amount=maturity_amount,
         maturity_date=data.maturity_date,
         uk_inv_id=uk_inv_id,
-        upload_file=file_url,
+        upload_file=stored.url,
         created_by=user_id,
         is_active=True
     )
 
     db.add(inv)
-    db.commit()
+    db.flush()
+    status = record_investment_created(db, inv)
+    record_portfolio_investment(db, inv, status)
+    # refresh before commit: the commit then hands the connection back
     db.refresh(inv)
+    db.commit()
+    response_cache.invalidate(DASHBOARD_ROUTE)
+    return inv
+
 
+def _get_investor(db: Session, user_id: int) -> UserRegistration:
     # ✅ FETCH USER
     user = db.query(UserRegistration).filter(
         UserRegistration.id == user_id
     ).first()
 
+    release_connection(db)
+    return user
+
+
+def _send_investment_email(user: UserRegistration, inv: InvConfig):
     # ✅ DEFINE EMAIL
     email = user.email
 
@@ -116,20 +223,51 @@ def create_investment(db: Session, data, user_id: int):
                 tenure_days=tenure_days
             )
 
-            send_email(
+            enqueue_email(
                 to_email=user.email,
                 subject=subject,
                 body=body
             )
 
-            print(f"✅ Investment email sent to {user.email}")
+            print(f"✅ Investment email queued for {user.email}")
 
         except Exception as e:
-            print("❌ Investment email failed:", e)
+            print("❌ Investment email could not be queued:", e)
 
     else:
         print("⚠️ User email not found, skipping email")
 
+    return email
+
+
+async def create_investment(db: Session, data, user_id: int):
+    """
+    DB steps run in the thread pool; the document is either streamed
+    (size-capped, hashed) by the async upload stage in between, or was
+    uploaded directly to object storage and is referenced by token.
+    """
+
+    plan = await run_in_threadpool(_get_active_plan, db, data.plan_type_id)
+
+    percentage = parse_percentage(plan.percentage)
+    interest = calculate_interest(data.principal_amount, percentage)
+    maturity_amount = data.principal_amount + interest
+
+    with no_db_held(db):
+        if data.upload_token:
+            key = _upload_key_from_token(data.upload_token, user_id)
+            stored = await resolve_direct_upload(key)
+        else:
+            stored = await store_file(data.upload_file)
+
+    inv = await run_in_threadpool(
+        _save_investment, db, data, user_id, interest, maturity_amount, stored
+    )
+
+    user = await run_in_threadpool(_get_investor, db, user_id)
+    with no_db_held(db):
+        email = await run_in_threadpool(_send_investment_email, user, inv)
+
     # ✅ RETURN (MUST BE INDENTED)
     return {
         "message": f"Investment created successfully. Confirmation email has been sent to {email}.",
@@ -145,64 +283,183 @@ def create_investment(db: Session, data, user_id: int):
 
 
 # ---------------- READ ALL ----------------
+# Keyset pagination on InvConfig.id: each page is an index range scan
+# ("id > after_id ORDER BY id LIMIT n"), however deep the client pages.
+
+LIST_COLUMNS = (
+    InvConfig.id,
+    InvConfig.principal_amount,
+    InvConfig.plan_type_id,
+    InvConfig.maturity_amount,
+    InvConfig.maturity_date,
+    InvConfig.created_date,
+    InvConfig.modified_by,
+    InvConfig.is_active,
+    InvConfig.interest_amount,
+    InvConfig.uk_inv_id,
+    InvConfig.created_by,
+    InvConfig.modified_date,
+    InvConfig.upload_file,
+    UserRegistration.inv_reg_id,
+)
+
+STREAM_BATCH_SIZE = int(os.getenv("INVESTMENT_STREAM_BATCH_SIZE", "1000"))
+
+
+def apply_investment_filters(stmt, filters: InvestmentListFilters):
+    """Apply the InvConfig-level filters (everything but inv_reg_id)."""
+    if filters.plan_type_id is not None:
+        stmt = stmt.where(InvConfig.plan_type_id == filters.plan_type_id)
+    if filters.status is not None:
+        stmt = stmt.where(status_filter(filters.status))
+    if filters.created_from is not None:
+        stmt = stmt.where(InvConfig.created_date >= filters.created_from)
+    if filters.created_to is not None:
+        # inclusive: everything created on created_to
+        stmt = stmt.where(
+            InvConfig.created_date < filters.created_to + datetime.timedelta(days=1)
+        )
+    if filters.maturity_from is not None:
+        stmt = stmt.where(InvConfig.maturity_date >= filters.maturity_from)
+    if filters.maturity_to is not None:
+        stmt = stmt.where(InvConfig.maturity_date <= filters.maturity_to)
+    return stmt
 
-# ---------------- READ ALL (BY LOGGED-IN USER) ----------------
 
-def get_all_investments(db: Session):
-    results = (
-        db.query(
+def _list_query(filters: InvestmentListFilters, after_id: Optional[int] = None):
+    stmt = (
+        select(*LIST_COLUMNS, status_case().label("status"))
+        .join(UserRegistration, UserRegistration.id == InvConfig.created_by)
+        .order_by(InvConfig.id.asc())
+    )
+
+    if after_id is not None:
+        stmt = stmt.where(InvConfig.id > after_id)
+    if filters.inv_reg_id is not None:
+        stmt = stmt.where(inv_reg_id_matches(filters.inv_reg_id))
+
+    return apply_investment_filters(stmt, filters)
+
+
+def _list_row(r) -> dict:
+    return {
+        "id": r.id,
+        "principal_amount": r.principal_amount,
+        "plan_type_id": r.plan_type_id,
+        "maturity_amount": r.maturity_amount,
+        "maturity_date": r.maturity_date,
+        "created_date": r.created_date,
+        "modified_by": r.modified_by,
+        "is_active": r.is_active,
+        "interest_amount": r.interest_amount,
+        "uk_inv_id": r.uk_inv_id,
+        "created_by": r.created_by,
+        "modified_date": r.modified_date,
+        "upload_file": r.upload_file,
+        "inv_reg_id": r.inv_reg_id,
+        "status": r.status,
+    }
+
+
+def get_all_investments(
+    db: Session,
+    filters: InvestmentListFilters,
+    after_id: Optional[int] = None,
+    limit: int = 100,
+):
+    """
+    One page of investments, oldest first.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    # one extra row tells us whether another page exists
+    results = db.execute(_list_query(filters, after_id).limit(limit + 1)).all()
+
+    next_cursor = results[limit - 1].id if len(results) > limit else None
+    return [_list_row(r) for r in results[:limit]], next_cursor
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def stream_investments(filters: InvestmentListFilters, after_id: Optional[int] = None):
+    """
+    Every matching investment as NDJSON lines, read through a server-side
+    cursor in STREAM_BATCH_SIZE batches so memory stays flat for the whole
+    book. Owns its session: it outlives the request's dependencies.
+    """
+    db = ReadSessionLocal()
+    try:
+        result = db.execute(
+            _list_query(filters, after_id).execution_options(yield_per=STREAM_BATCH_SIZE)
+        )
+        for r in result:
+            yield json.dumps(_list_row(r), default=_json_default) + "\n"
+    finally:
+        db.close()
+
+# InvConfig.created_date
+
+# ---------------- READ MY INVESTMENTS ----------------
+# Only the columns the "my investments" screen shows, keyset-paged.
+# my_investments_etag() is one aggregate over the user's rows, so an
+# unchanged page can be answered 304 without building it.
+
+async def get_my_investments(
+    db: AsyncSession,
+    user_id: int,
+    after_id: Optional[int] = None,
+    limit: int = 50,
+):
+    """Returns (rows, next_cursor); next_cursor is None on the last page."""
+    stmt = (
+        select(
             InvConfig.id,
-            InvConfig.principal_amount,
+            InvConfig.uk_inv_id,
             InvConfig.plan_type_id,
+            InvConfig.principal_amount,
+            InvConfig.interest_amount,
             InvConfig.maturity_amount,
             InvConfig.maturity_date,
             InvConfig.created_date,
-            InvConfig.modified_by,
-            InvConfig.is_active,
-            InvConfig.interest_amount,
-            InvConfig.uk_inv_id,
-            InvConfig.created_by,
-            InvConfig.modified_date,
             InvConfig.upload_file,
-            UserRegistration.inv_reg_id
+            status_case().label("status"),
         )
-        .join(
-            UserRegistration,
-            UserRegistration.id == InvConfig.created_by
-        )
-        .all()
+        .where(InvConfig.created_by == user_id)
     )
+    if after_id is not None:
+        stmt = stmt.where(InvConfig.id > after_id)
+
+    # one extra row tells us whether another page exists
+    rows = (await db.execute(stmt.order_by(InvConfig.id.asc()).limit(limit + 1))).all()
+
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+async def my_investments_etag(db: AsyncSession, user_id: int, after_id: Optional[int], limit: int) -> str:
+    """
+    Weak ETag of one /investments/my page. Changes when the user's
+    investments are added or modified (count, max id, max modified_date),
+    and daily, since status depends on today's date.
+    """
+    count, max_id, max_modified = (
+        await db.execute(
+            select(
+                func.count(InvConfig.id),
+                func.max(InvConfig.id),
+                func.max(InvConfig.modified_date),
+            )
+            .where(InvConfig.created_by == user_id)
+        )
+    ).one()
 
-    return [
-        {
-            "id": r.id,
-            "principal_amount": r.principal_amount,
-            "plan_type_id": r.plan_type_id,
-            "maturity_amount": r.maturity_amount,
-            "maturity_date": r.maturity_date,
-            "created_date": r.created_date,
-            "modified_by": r.modified_by,
-            "is_active": r.is_active,
-            "interest_amount": r.interest_amount,
-            "uk_inv_id": r.uk_inv_id,
-            "created_by": r.created_by,
-            "modified_date": r.modified_date,
-            "upload_file": r.upload_file,
-            "inv_reg_id": r.inv_reg_id
-        }
-        for r in results
-    ]
-
-# InvConfig.created_date
-
-# ---------------- READ MY INVESTMENTS ----------------
-def get_my_investments(db: Session, user_id: int):
-    return (
-        db.query(InvConfig)
-        .filter(InvConfig.created_by == user_id)
-        .order_by(InvConfig.id.asc())
-        .all()
-    )
+    version = f"{user_id}:{count}:{max_id}:{max_modified}:{datetime.date.today()}:{after_id}:{limit}"
+    return 'W/"' + hashlib.sha1(version.encode()).hexdigest()[:20] + '"'
 
         
         
@@ -224,6 +481,29 @@ def get_investment_by_uk_inv_id(db: Session, uk_inv_id: str):
     return inv
 
 
+def get_investment_detail(db: Session, uk_inv_id: str):
+    row = (
+        db.query(
+            InvConfig.created_by,
+            InvConfig.id,
+            InvConfig.uk_inv_id,
+            status_case().label("status"),
+        )
+        .filter(InvConfig.uk_inv_id == uk_inv_id)
+        .first()
+    )
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Investment not found")
+
+    return {
+        "created_by": row.created_by,
+        "investment_id": row.id,      # internal PK (optional)
+        "uk_inv_id": row.uk_inv_id,
+        "status": row.status
+    }
+
+
 
 # # ---------------- READ BY CUSTOMER ----------------
 
@@ -261,10 +541,13 @@ def get_investment_by_uk_inv_id(db: Session, uk_inv_id: str):
 def delete_investment_by_uk_inv_id(db: Session, uk_inv_id: str):
     inv = get_investment_by_uk_inv_id(db, uk_inv_id)
 
+    status = record_investment_deactivated(db, inv)
+    record_portfolio_deactivation(db, inv, status)
     inv.is_active = False
     inv.modified_date = datetime.datetime.utcnow()
 
     db.commit()
+    response_cache.invalidate(DASHBOARD_ROUTE)
 
     return {"message": "Investment deactivated successfully"}
 
@@ -1,14 +1,18 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
 
+from core.database import no_db_held, release_connection
 from models.generated_models import UserRegistration
-from utils.email import send_email
+from schemas.user_schema import UserCreate
+from utils.email_outbox import enqueue_email
+from utils.response_cache import response_cache, DASHBOARD_ROUTE
 from utils.otp_store import (
     generate_otp,
     verify_otp,
     pop_user_data,
 )
-from utils.hash_password import hash_password
+from services.dashboard_rollup_service import record_investor_change
 
 
 # --------------------------------------------------
@@ -18,23 +22,24 @@ def send_otp_service(db: Session, email: str):
     """
     STEP 1:
     - Generate OTP
-    - Store OTP in memory (otp_store.py)
-    - Send OTP email
+    - Store OTP in the OTP store (otp_store.py)
+    - Queue OTP email (email_outbox.py)
     - ❌ NO DB interaction
     """
 
     otp = generate_otp(email)
 
-    send_email(
-        to_email=email,
-        subject="OTP Verification – INRFS",
-        body=(
-            f"Your OTP for email verification is:\n\n"
-            f"{otp}\n\n"
-            f"This OTP is valid for 5 minutes.\n\n"
-            f"Regards,\nINRFS Team"
-        ),
-    )
+    with no_db_held(db):
+        enqueue_email(
+            to_email=email,
+            subject="OTP Verification – INRFS",
+            body=(
+                f"Your OTP for email verification is:\n\n"
+                f"{otp}\n\n"
+                f"This OTP is valid for 5 minutes.\n\n"
+                f"Regards,\nINRFS Team"
+            ),
+        )
 
 
     
@@ -43,45 +48,23 @@ def send_otp_service(db: Session, email: str):
 
 # VERIFY OTP + CREATE USER (DB INSERT HAPPENS HERE)
 
-def verify_otp_service(db: Session, email: str, otp: str):
-    """
-    STEP 2:
-    - Verify OTP (email + otp only)
-    - Fetch stored user data
-    - Hash password
-    - Create user in DB with ALL fields
-    """
-
-    # 1️⃣ Verify OTP
-    if not verify_otp(email, otp):
-        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
-
-    # 2️⃣ Fetch stored registration data
-    user_data = pop_user_data(email)
-    if not user_data:
-        raise HTTPException(
-            status_code=400,
-            detail="Registration data expired. Please register again."
-        )
-
-    # 3️⃣ Prevent duplicate registration
-    if db.query(UserRegistration).filter(
+def _is_email_registered(db: Session, email: str) -> bool:
+    registered = db.query(UserRegistration).filter(
         UserRegistration.email == email
-    ).first():
-        raise HTTPException(
-            status_code=400,
-            detail="User already registered"
-        )
+    ).first() is not None
+
+    # the insert runs in a later threadpool hop: don't hold the connection in between
+    release_connection(db)
+    return registered
 
-    # 4️⃣ Hash password (🔥 correct place 🔥)
-    user_data["password"] = hash_password(user_data["password"])
 
+def _create_verified_user(db: Session, user_data: dict) -> UserRegistration:
     # 5️⃣ Generate Investor Registration ID (lazy import avoids circular import)
     from services.user_service import generate_inv_reg_id
 
     inv_reg_id = None
     if user_data["role_id"] == 1:
-        inv_reg_id = generate_inv_reg_id(db)
+        inv_reg_id = generate_inv_reg_id()
 
     # 6️⃣ Create user with ALL required fields
     user = UserRegistration(
@@ -100,12 +83,20 @@ def verify_otp_service(db: Session, email: str, otp: str):
     )
 
     db.add(user)
-    db.commit()
+    if user.role_id == 1:
+        record_investor_change(db, +1)
+    db.flush()
+    # refresh before commit: the commit then hands the connection back
     db.refresh(user)
+    db.commit()
+    response_cache.invalidate(DASHBOARD_ROUTE)
+    return user
+
 
+def _send_registration_email(user: UserRegistration):
     # 7️⃣ Confirmation Email (DO NOT BREAK API IF EMAIL FAILS)
     try:
-        send_email(
+        enqueue_email(
             to_email=user.email,
             subject="Registration Successful – INRFS",
             body=(
@@ -118,7 +109,45 @@ def verify_otp_service(db: Session, email: str, otp: str):
         )
     except Exception as e:
         # Email failure should NOT affect registration
-        print("Email sending failed:", str(e))
+        print("Email queueing failed:", str(e))
+
+
+async def verify_otp_service(db: Session, email: str, otp: str):
+    """
+    STEP 2:
+    - Verify OTP (email + otp only)
+    - Fetch stored user data
+    - Password arrives already hashed (see register_user)
+    - Create user in DB with ALL fields
+    """
+
+    # 1️⃣ Verify OTP
+    if not verify_otp(email, otp):
+        raise HTTPException(status_code=400, detail="Invalid or expired OTP")
+
+    # 2️⃣ Fetch stored registration data
+    user_data = pop_user_data(email)
+    if not user_data:
+        raise HTTPException(
+            status_code=400,
+            detail="Registration data expired. Please register again."
+        )
+
+    # stored as JSON → restore typed values (dob)
+    user_data = UserCreate.model_validate(user_data).model_dump()
+
+    # 3️⃣ Prevent duplicate registration
+    if await run_in_threadpool(_is_email_registered, db, email):
+        raise HTTPException(
+            status_code=400,
+            detail="User already registered"
+        )
+
+    # 4️⃣ Password was hashed at registration (register_user)
+    user = await run_in_threadpool(_create_verified_user, db, user_data)
+
+    with no_db_held(db):
+        await run_in_threadpool(_send_registration_email, user)
 
     return {
         "message": "OTP verified and user registered successfully",
@@ -1,11 +1,14 @@
 from fastapi import HTTPException
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from jose import jwt, JWTError
 
+from core.database import no_db_held, release_connection
 from models.generated_models import UserRegistration
 from utils.jwt import create_reset_password_token, SECRET_KEY, ALGORITHM
-from utils.hash_password import hash_password
-from utils.email import send_email
+from utils.hash_password import hash_password_async
+from utils.email_outbox import enqueue_email
+from utils.auth import invalidate_user
 
 import os
 from dotenv import load_dotenv
@@ -28,6 +31,7 @@ def forgot_password_service(db: Session, email: str):
         "message": "If the email exists, a reset link has been sent"
     }
 
+    release_connection(db)
     if not user:
         return response
 
@@ -45,12 +49,13 @@ def forgot_password_service(db: Session, email: str):
     <p>Regards,<br>INRFS Team</p>
     """
 
-    send_email(
-        to_email=email,
-        subject="Reset Your Password – INRFS",
-        body=html_body,
-        is_html=True  # send as HTML
-    )
+    with no_db_held(db):
+        enqueue_email(
+            to_email=email,
+            subject="Reset Your Password – INRFS",
+            body=html_body,
+            is_html=True  # send as HTML
+        )
 
     # 🔥 ADD TOKEN TO RESPONSE (DEV / TEST ONLY)
     response["reset_token"] = token
@@ -63,7 +68,31 @@ def forgot_password_service(db: Session, email: str):
 # -------------------------
 # RESET PASSWORD
 # -------------------------
-def reset_password_service(db: Session, token: str, new_password: str):
+def _get_active_user_by_email(db: Session, email: str):
+    user = db.query(UserRegistration).filter(
+        UserRegistration.email == email,
+        UserRegistration.is_active == True
+    ).first()
+
+    # password hashing comes next: don't keep the connection through it
+    release_connection(db)
+    return user
+
+
+def _save_new_password(db: Session, user: UserRegistration, hashed_password: str):
+    user.password = hashed_password
+
+    # -------------------------
+    # ✅ AUTO-VERIFY INVESTORS ONLY
+    # -------------------------
+    if user.role_id == 1:
+        user.is_verified = True
+
+    db.commit()
+    invalidate_user(user)
+
+
+async def reset_password_service(db: Session, token: str, new_password: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
@@ -80,10 +109,7 @@ def reset_password_service(db: Session, token: str, new_password: str):
         # -------------------------
         # FETCH ACTIVE USER
         # -------------------------
-        user = db.query(UserRegistration).filter(
-            UserRegistration.email == email,
-            UserRegistration.is_active == True
-        ).first()
+        user = await run_in_threadpool(_get_active_user_by_email, db, email)
 
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -91,20 +117,11 @@ def reset_password_service(db: Session, token: str, new_password: str):
         # -------------------------
         # UPDATE PASSWORD
         # -------------------------
-        user.password = hash_password(new_password)
-
-        # -------------------------
-        # ✅ AUTO-VERIFY INVESTORS ONLY
-        # -------------------------
-        if user.role_id == 1:
-            user.is_verified = True
-
-        db.commit()
+        with no_db_held(db):
+            hashed_password = await hash_password_async(new_password)
+        await run_in_threadpool(_save_new_password, db, user, hashed_password)
 
         return {"message": "Password reset successful"}
 
     except JWTError:
         raise HTTPException(status_code=400, detail="Invalid or expired token")
-
-
-
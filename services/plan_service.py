@@ -1,9 +1,12 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from models.generated_models import MasterPlanType
 
 
 from schemas.plan_schema import PlanCreate, PlanUpdate
+from utils.response_cache import response_cache, PLANS_ROUTE, DASHBOARD_ROUTE
 
 
 def create_plan(db: Session, data: PlanCreate):
@@ -15,12 +18,13 @@ def create_plan(db: Session, data: PlanCreate):
     plan = MasterPlanType(**data.dict())
     db.add(plan)
     db.commit()
+    response_cache.invalidate(PLANS_ROUTE, DASHBOARD_ROUTE)
     db.refresh(plan)
     return plan
 
 
-def get_all_plans(db: Session):
-    return db.query(MasterPlanType).all()
+async def get_all_plans(db: AsyncSession):
+    return (await db.execute(select(MasterPlanType))).scalars().all()
 
 
 def get_plan_by_id(db: Session, plan_id: int):
@@ -39,6 +43,7 @@ def update_plan(db: Session, plan_id: int, data: PlanUpdate):
         setattr(plan, key, value)
 
     db.commit()
+    response_cache.invalidate(PLANS_ROUTE, DASHBOARD_ROUTE)
     db.refresh(plan)
     return plan
 
@@ -47,4 +52,5 @@ def delete_plan(db: Session, plan_id: int):
     plan = get_plan_by_id(db, plan_id)
     db.delete(plan)
     db.commit()
+    response_cache.invalidate(PLANS_ROUTE, DASHBOARD_ROUTE)
     return {"message": "Plan deleted successfully"}
@@ -0,0 +1,211 @@
+import datetime
+from typing import Optional
+
+from sqlalchemy import and_, delete, false, func, or_, select
+from sqlalchemy.orm import Session
+
+from core.database import dialect_insert
+from models.generated_models import InvConfig, UserPortfolioSummary
+
+# --------------------------------------------------
+# USER PORTFOLIO SUMMARY
+# --------------------------------------------------
+# One row per investor (user_portfolio_summary), kept in the same
+# transaction as the investment it reflects.
+# - investment_count / total_* / first / last cover ALL investments,
+#   deactivated ones included (what GET /users/ always reported)
+# - active_* / completed_* split the not-deactivated ones by the
+#   dashboard rollup's matured_through (see dashboard_rollup_service),
+#   and move together with the rollup in its daily maturity job
+
+_BUCKETS = {
+    "active": ("active_count", "active_principal_amount", "active_maturity_amount"),
+    "completed": ("completed_count", "completed_principal_amount", "completed_maturity_amount"),
+}
+
+
+def _least(db: Session, a, b):
+    # NULL-safe on both dialects: PostgreSQL LEAST skips NULLs, SQLite min() does not
+    fn = func.least if db.get_bind().dialect.name == "postgresql" else func.min
+    return fn(func.coalesce(a, b), func.coalesce(b, a))
+
+
+def _greatest(db: Session, a, b):
+    fn = func.greatest if db.get_bind().dialect.name == "postgresql" else func.max
+    return fn(func.coalesce(a, b), func.coalesce(b, a))
+
+
+def _bucket(status: Optional[str], sign: int, count: int, principal, maturity) -> dict:
+    if status not in _BUCKETS:
+        return {}
+    count_col, principal_col, maturity_col = _BUCKETS[status]
+    return {
+        count_col: sign * count,
+        principal_col: sign * principal,
+        maturity_col: sign * maturity,
+    }
+
+
+def _upsert(db: Session, user_id: int, increments: dict, **dates):
+    stmt = dialect_insert(db)(UserPortfolioSummary).values(user_id=user_id, **increments, **dates)
+
+    set_ = {
+        col: getattr(UserPortfolioSummary, col) + getattr(stmt.excluded, col)
+        for col in increments
+    }
+    if "first_investment_date" in dates:
+        set_["first_investment_date"] = _least(
+            db, UserPortfolioSummary.first_investment_date, stmt.excluded.first_investment_date
+        )
+    if "last_maturity_date" in dates:
+        set_["last_maturity_date"] = _greatest(
+            db, UserPortfolioSummary.last_maturity_date, stmt.excluded.last_maturity_date
+        )
+
+    db.execute(stmt.on_conflict_do_update(index_elements=["user_id"], set_=set_))
+
+
+# ---------------- WRITE HOOKS (caller commits) ----------------
+# `status` is what record_investment_created / _deactivated in
+# dashboard_rollup_service returned, so both tables agree.
+
+def record_portfolio_investment(db: Session, inv: InvConfig, status: str):
+    if inv.created_by is None:
+        return
+
+    _upsert(
+        db,
+        inv.created_by,
+        {
+            "investment_count": 1,
+            "total_principal_amount": inv.principal_amount,
+            "total_maturity_amount": inv.maturity_amount,
+            **_bucket(status, +1, 1, inv.principal_amount, inv.maturity_amount),
+        },
+        first_investment_date=inv.created_date,
+        last_maturity_date=inv.maturity_date,
+    )
+
+
+def record_portfolio_deactivation(db: Session, inv: InvConfig, status: Optional[str]):
+    increments = _bucket(status, -1, 1, inv.principal_amount, inv.maturity_amount)
+    if inv.created_by is None or not increments:
+        return
+
+    _upsert(db, inv.created_by, increments)
+
+
+# ---------------- MAINTENANCE ----------------
+
+def _open():
+    # not deactivated (is_active is nullable; NULL counts as not inactive)
+    return or_(InvConfig.is_active == True, InvConfig.is_active.is_(None))
+
+
+def advance_portfolio_maturities(db: Session, matured_from: datetime.date, matured_through: datetime.date):
+    """Move investments maturing in (matured_from, matured_through] from active to completed."""
+    rows = db.execute(
+        select(
+            InvConfig.created_by,
+            func.count().label("n"),
+            func.sum(InvConfig.principal_amount).label("principal"),
+            func.sum(InvConfig.maturity_amount).label("maturity"),
+        )
+        .where(and_(
+            _open(),
+            InvConfig.created_by.isnot(None),
+            InvConfig.maturity_date > matured_from,
+            InvConfig.maturity_date <= matured_through,
+        ))
+        .group_by(InvConfig.created_by)
+    ).all()
+
+    for r in rows:
+        _upsert(db, r.created_by, {
+            **_bucket("active", -1, r.n, r.principal, r.maturity),
+            **_bucket("completed", +1, r.n, r.principal, r.maturity),
+        })
+
+
+def _summary_rows(matured_through: Optional[datetime.date], lo: Optional[int] = None, hi: Optional[int] = None):
+    if matured_through is None:
+        # nothing has been moved to completed yet
+        completed = false()
+    else:
+        completed = and_(_open(), InvConfig.maturity_date <= matured_through)
+    active = and_(_open(), ~completed)
+
+    def bucket(condition):
+        return (
+            func.count().filter(condition),
+            func.coalesce(func.sum(InvConfig.principal_amount).filter(condition), 0),
+            func.coalesce(func.sum(InvConfig.maturity_amount).filter(condition), 0),
+        )
+
+    stmt = (
+        select(
+            InvConfig.created_by,
+            func.count(),
+            func.sum(InvConfig.principal_amount),
+            func.sum(InvConfig.maturity_amount),
+            func.min(InvConfig.created_date),
+            func.max(InvConfig.maturity_date),
+            *bucket(active),
+            *bucket(completed),
+        )
+        .where(InvConfig.created_by.isnot(None))
+        .group_by(InvConfig.created_by)
+    )
+    if lo is not None:
+        stmt = stmt.where(InvConfig.created_by >= lo)
+    if hi is not None:
+        stmt = stmt.where(InvConfig.created_by <= hi)
+    return stmt
+
+
+_COLUMNS = (
+    "user_id",
+    "investment_count",
+    "total_principal_amount",
+    "total_maturity_amount",
+    "first_investment_date",
+    "last_maturity_date",
+    "active_count",
+    "active_principal_amount",
+    "active_maturity_amount",
+    "completed_count",
+    "completed_principal_amount",
+    "completed_maturity_amount",
+)
+
+
+def rebuild_portfolio_range(db: Session, matured_through: Optional[datetime.date],
+                            lo: Optional[int] = None, hi: Optional[int] = None) -> int:
+    """
+    Recompute the summaries of users lo..hi (all when both are None).
+    Returns how many rows changed. Caller holds the rollup meta lock
+    exclusively and commits.
+    """
+    in_range = []
+    if lo is not None:
+        in_range.append(UserPortfolioSummary.user_id >= lo)
+    if hi is not None:
+        in_range.append(UserPortfolioSummary.user_id <= hi)
+
+    before = {
+        row[0]: tuple(row[1:])
+        for row in db.execute(
+            select(*(getattr(UserPortfolioSummary, c) for c in _COLUMNS)).where(*in_range)
+        )
+    }
+    expected = {row[0]: tuple(row[1:]) for row in db.execute(_summary_rows(matured_through, lo, hi))}
+
+    changed = sum(1 for k in before.keys() | expected.keys() if before.get(k) != expected.get(k))
+    if changed:
+        db.execute(delete(UserPortfolioSummary).where(*in_range))
+        db.execute(
+            dialect_insert(db)(UserPortfolioSummary).from_select(
+                _COLUMNS, _summary_rows(matured_through, lo, hi)
+            )
+        )
+    return changed
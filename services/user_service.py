@@ -1,44 +1,113 @@
+import os
+
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
-from sqlalchemy import func
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
 
-from models.generated_models import UserRegistration, InvConfig
+from core.database import no_db_held, release_connection
+from models.generated_models import UserRegistration, InvConfig, UserPortfolioSummary
 from schemas.user_schema import UserCreate
-from utils.hash_password import hash_password, verify_password
+from utils.hash_password import hash_password_async, verify_password_and_update_async
 from utils.jwt import create_access_token, create_refresh_token
 from services.otp_service import send_otp_service
 from utils.otp_store import store_user_data, is_user_registered
+from utils.auth import invalidate_user
+from utils.response_cache import response_cache, DASHBOARD_ROUTE
+from services.id_allocator_service import HiLoAllocator
+from services.dashboard_rollup_service import record_investor_change
 
 
 # --------------------------------------------------
 # Generate Investor Registration ID
 # --------------------------------------------------
-def generate_inv_reg_id(db: Session):
-    last_user = (
-        db.query(UserRegistration)
-        .filter(UserRegistration.inv_reg_id.isnot(None))
-        .order_by(UserRegistration.id.desc())
-        .first()
+# Allocated in blocks from the id_allocator counter (see
+# services/id_allocator_service.py): safe across workers, no table scan.
+# Widen INV_REG_ID_WIDTH before the counter passes 10**width, then
+# re-pad existing IDs with scripts/migrate_inv_reg_ids.py.
+INV_REG_ID_WIDTH = int(os.getenv("INV_REG_ID_WIDTH", "4"))
+
+
+def _seed_inv_reg_id(conn) -> int:
+    # runs once, when the counter row is first created:
+    # continue after the highest existing I-number
+    highest = 0
+    rows = conn.execute(
+        select(UserRegistration.inv_reg_id).where(UserRegistration.inv_reg_id.isnot(None))
     )
+    for (inv_reg_id,) in rows:
+        if inv_reg_id.startswith("I") and inv_reg_id[1:].isdigit():
+            highest = max(highest, int(inv_reg_id[1:]))
+    return highest + 1
+
+
+_inv_reg_id_allocator = HiLoAllocator("inv_reg_id", _seed_inv_reg_id)
 
-    if not last_user:
-        return "I0001"
 
-    last_id = last_user.inv_reg_id
-    if not last_id.startswith("I") or not last_id[1:].isdigit():
-        return "I0001"
+def format_inv_reg_id(number: int, width: int = INV_REG_ID_WIDTH) -> str:
+    return f"I{number:0{width}d}"
 
-    return f"I{int(last_id[1:]) + 1:04d}"
+
+def generate_inv_reg_id() -> str:
+    return format_inv_reg_id(_inv_reg_id_allocator.next())
+
+
+def inv_reg_id_matches(inv_reg_id: str):
+    """
+    Filter for a Customer-ID as the investor knows it. An ID issued at an
+    older width (I0042) keeps working after scripts/migrate_inv_reg_ids.py
+    re-padded it (I00000042), and before the script has run.
+    """
+    forms = {inv_reg_id}
+    if inv_reg_id.startswith("I") and inv_reg_id[1:].isdigit():
+        forms.add(format_inv_reg_id(int(inv_reg_id[1:]), INV_REG_ID_WIDTH))
+    return UserRegistration.inv_reg_id.in_(sorted(forms))
 
 
 # --------------------------------------------------
 # REGISTER USER (ROLE-BASED)
 # --------------------------------------------------
-def register_user(db: Session, data: UserCreate):
+def _check_duplicate_user(db: Session, data: UserCreate):
+    if db.query(UserRegistration).filter(
+        UserRegistration.email == data.email
+    ).first():
+        raise HTTPException(status_code=400, detail="Email already registered")
+
+    if db.query(UserRegistration).filter(
+        UserRegistration.mobile == data.mobile
+    ).first():
+        raise HTTPException(status_code=400, detail="Mobile already registered")
+
+    # OTP email or password hashing comes next: give the connection back
+    release_connection(db)
+
+
+def _start_investor_registration(db: Session, data: UserCreate, hashed_pwd: str):
+    # Store user data temporarily (OTP store, JSON-serialisable).
+    # Never the plain password: the store may be on disk.
+    user_data = data.model_dump(mode="json")
+    user_data["password"] = hashed_pwd
+    store_user_data(data.email, user_data)
+
+    # Send OTP
+    send_otp_service(db, data.email)
+
+
+def _save_user(db: Session, user: UserRegistration):
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+
+async def register_user(db: Session, data: UserCreate):
     """
     role_id = 1 → Investor → OTP required
     role_id = 2 → Super Admin → Direct save
     role_id = 3 → Admin → Direct save
+
+    DB work runs in the request thread pool; hashing runs on the
+    dedicated hashing executor.
     """
 
     if data.role_id not in (1, 2, 3):
@@ -47,27 +116,16 @@ def register_user(db: Session, data: UserCreate):
     # -------------------------------
     # Duplicate checks
     # -------------------------------
-    if db.query(UserRegistration).filter(
-        UserRegistration.email == data.email
-    ).first():
-        raise HTTPException(status_code=400, detail="Email already registered")
-
-    if db.query(UserRegistration).filter(
-        UserRegistration.mobile == data.mobile
-    ).first():
-        raise HTTPException(status_code=400, detail="Mobile already registered")
+    await run_in_threadpool(_check_duplicate_user, db, data)
 
     # --------------------------------------------------
     # ✅ INVESTOR (OTP FLOW)
     # --------------------------------------------------
     if data.role_id == 1:
-        # Store user data temporarily (memory)
-        store_user_data(data.email, data.model_dump())
-
-        # Send OTP
-        send_otp_service(db, data.email)
-
+        with no_db_held(db):
+            hashed_pwd = await hash_password_async(data.password)
 
+        await run_in_threadpool(_start_investor_registration, db, data, hashed_pwd)
 
         return {
             "message": "OTP sent successfully. Verify OTP to complete registration",
@@ -77,7 +135,8 @@ def register_user(db: Session, data: UserCreate):
     # --------------------------------------------------
     # ✅ ADMIN / SUPER ADMIN (DIRECT SAVE)
     # --------------------------------------------------
-    hashed_pwd = hash_password(data.password)
+    with no_db_held(db):
+        hashed_pwd = await hash_password_async(data.password)
 
     user = UserRegistration(
         first_name=data.first_name,
@@ -94,9 +153,7 @@ def register_user(db: Session, data: UserCreate):
         created_by=1,
     )
 
-    db.add(user)
-    db.commit()
-    db.refresh(user)
+    await run_in_threadpool(_save_user, db, user)
 
     return {
         "message": "User registered successfully",
@@ -108,7 +165,33 @@ def register_user(db: Session, data: UserCreate):
 # --------------------------------------------------
 # LOGIN USER (UPDATED – with is_active check)
 # --------------------------------------------------
-def login_user(db: Session, data):
+def _fetch_login_user(db: Session, data):
+    if data.inv_reg_id:
+        user = db.query(UserRegistration).filter(
+            inv_reg_id_matches(data.inv_reg_id)
+        ).first()
+    else:
+        user = db.query(UserRegistration).filter(
+            UserRegistration.email == data.email
+        ).first()
+
+    # password verification comes next: don't keep the connection through it
+    release_connection(db)
+    return user
+
+
+def _rehash_user_password(db: Session, user: UserRegistration, new_hash: str):
+    # Login must not fail just because the upgrade could not be saved
+    try:
+        user.password = new_hash
+        db.commit()
+        db.refresh(user)
+    except Exception as e:
+        db.rollback()
+        print("Password rehash failed:", str(e))
+
+
+async def login_user(db: Session, data):
 
     # -------------------------
     # INPUT VALIDATION
@@ -128,14 +211,7 @@ def login_user(db: Session, data):
     # -------------------------
     # FETCH USER
     # -------------------------
-    if data.inv_reg_id:
-        user = db.query(UserRegistration).filter(
-            UserRegistration.inv_reg_id == data.inv_reg_id
-        ).first()
-    else:
-        user = db.query(UserRegistration).filter(
-            UserRegistration.email == data.email
-        ).first()
+    user = await run_in_threadpool(_fetch_login_user, db, data)
 
     if not user:
         raise HTTPException(
@@ -164,12 +240,22 @@ def login_user(db: Session, data):
     # -------------------------
     # PASSWORD CHECK
     # -------------------------
-    if not verify_password(data.password, user.password):
+    with no_db_held(db):
+        is_valid, new_hash = await verify_password_and_update_async(
+            data.password, user.password
+        )
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials",
         )
 
+    # -------------------------
+    # TRANSPARENT REHASH (hash policy changed)
+    # -------------------------
+    if new_hash:
+        await run_in_threadpool(_rehash_user_password, db, user, new_hash)
+
     # -------------------------
     # TOKEN GENERATION
     # -------------------------
@@ -195,6 +281,8 @@ def login_user(db: Session, data):
         "refresh_token": refresh_token,
         "token_type": "bearer",
     }
+
+
 def resend_otp_service(db: Session, email: str):
     """
     Resend OTP for a user who has a pending registration.
@@ -299,52 +387,100 @@ def resend_otp_service(db: Session, email: str):
 # --------------------------------------------------
 # CRUD OPERATIONS (UNCHANGED)
 # --------------------------------------------------
-def get_all_users(db: Session):
-    users = db.query(UserRegistration).all()
-    response = []
-
-    for user in users:
-        user_data = {
-            "id": user.id,
-            "inv_reg_id": user.inv_reg_id,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "email": user.email,
-            "mobile": user.mobile,
-            "role_id": user.role_id,
-            "gender_id": user.gender_id,
-            "age": user.age,
-            "dob": user.dob,
-        }
-
-        if user.role_id == 1:
-            agg = (
-                db.query(
-                    func.coalesce(func.sum(InvConfig.principal_amount), 0),
-                    func.coalesce(func.sum(InvConfig.maturity_amount), 0),
-                    func.min(InvConfig.created_date),
-                    func.max(InvConfig.maturity_date),
-                )
-                .filter(InvConfig.created_by == user.id)
-                .first()
-            )
+# Investor totals come from user_portfolio_summary (maintained on write
+# by portfolio_summary_service), so listing a page is a single indexed
+# join instead of aggregating inv_config per user.
+def _user_detail_query():
+    return (
+        select(
+            UserRegistration.id,
+            UserRegistration.inv_reg_id,
+            UserRegistration.first_name,
+            UserRegistration.last_name,
+            UserRegistration.email,
+            UserRegistration.mobile,
+            UserRegistration.role_id,
+            UserRegistration.gender_id,
+            UserRegistration.age,
+            UserRegistration.dob,
+            UserPortfolioSummary.total_principal_amount,
+            UserPortfolioSummary.total_maturity_amount,
+            UserPortfolioSummary.first_investment_date,
+            UserPortfolioSummary.last_maturity_date,
+            UserPortfolioSummary.active_count,
+            UserPortfolioSummary.active_principal_amount,
+            UserPortfolioSummary.completed_count,
+            UserPortfolioSummary.completed_principal_amount,
+        )
+        .outerjoin(UserPortfolioSummary, UserPortfolioSummary.user_id == UserRegistration.id)
+    )
 
-            user_data.update({
-                "total_principal_amount": agg[0],
-                "total_maturity_amount": agg[1],
-                "investment_created_date": agg[2],
-                "investment_maturity_date": agg[3],
-            })
 
-        response.append(user_data)
+def _user_detail(user) -> dict:
+    user_data = {
+        "id": user.id,
+        "inv_reg_id": user.inv_reg_id,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "mobile": user.mobile,
+        "role_id": user.role_id,
+        "gender_id": user.gender_id,
+        "age": user.age,
+        "dob": user.dob,
+    }
 
-    return response
+    if user.role_id == 1:
+        # no summary row yet = no investments
+        user_data.update({
+            "total_principal_amount": user.total_principal_amount or 0,
+            "total_maturity_amount": user.total_maturity_amount or 0,
+            "investment_created_date": user.first_investment_date,
+            "investment_maturity_date": user.last_maturity_date,
+            "active_investment_count": user.active_count or 0,
+            "active_principal_amount": user.active_principal_amount or 0,
+            "completed_investment_count": user.completed_count or 0,
+            "completed_principal_amount": user.completed_principal_amount or 0,
+        })
+
+    return user_data
+
+
+def get_all_users(
+    db: Session,
+    after_id: int | None = None,
+    limit: int = 100,
+    role_id: int | None = None,
+):
+    """Returns (rows, next_cursor); next_cursor is None on the last page."""
+    stmt = _user_detail_query()
+    if after_id is not None:
+        stmt = stmt.where(UserRegistration.id > after_id)
+    if role_id is not None:
+        stmt = stmt.where(UserRegistration.role_id == role_id)
+
+    # one extra row tells us whether another page exists
+    rows = db.execute(stmt.order_by(UserRegistration.id.asc()).limit(limit + 1)).all()
+
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return [_user_detail(user) for user in rows[:limit]], next_cursor
+
+
+async def get_user_detail(db: AsyncSession, inv_reg_id: str):
+    user = (
+        await db.execute(
+            _user_detail_query()
+            .where(inv_reg_id_matches(inv_reg_id))
+            .limit(1)
+        )
+    ).first()
+    return _user_detail(user) if user else None
 
 
 def get_user_by_inv_reg_id(db: Session, inv_reg_id: str):
     return (
         db.query(UserRegistration)
-        .filter(UserRegistration.inv_reg_id == inv_reg_id)
+        .filter(inv_reg_id_matches(inv_reg_id))
         .first()
     )
 
@@ -359,6 +495,7 @@ def update_user(db: Session, inv_reg_id: str, data):
 
     db.commit()
     db.refresh(user)
+    invalidate_user(user)
     return user
 
 
@@ -381,7 +518,11 @@ def delete_user(db: Session, inv_reg_id: str):
         )
 
     db.delete(user)
+    if user.role_id == 1:
+        record_investor_change(db, -1)
     db.commit()
+    response_cache.invalidate(DASHBOARD_ROUTE)
+    invalidate_user(user)
     return True
 
 
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# app modules read these at import time
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("RAZORPAY_KEY_ID", "test")
+os.environ.setdefault("RAZORPAY_KEY_SECRET", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,103 @@
+import asyncio
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from core.database import SessionLocal, no_db_held, release_connection
+from models.generated_models import IdAllocator, UserRegistration
+from schemas.user_schema import UserLogin
+from services import user_service
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # file-backed with a real QueuePool, so checkedout() means something
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'db.sqlite'}", connect_args={"check_same_thread": False}
+    )
+    IdAllocator.metadata.create_all(
+        engine, tables=[IdAllocator.__table__, UserRegistration.__table__]
+    )
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    session = SessionLocal(bind=engine)
+    yield session
+    session.close()
+
+
+def test_checkout_inside_no_db_held_raises(engine):
+    with no_db_held():
+        with pytest.raises(RuntimeError):
+            engine.connect()
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_no_db_held_refuses_a_session_in_a_transaction(db):
+    db.execute(text("SELECT 1"))
+
+    with pytest.raises(RuntimeError):
+        with no_db_held(db):
+            pass
+
+    release_connection(db)
+    with no_db_held(db):
+        pass
+
+
+@pytest.mark.parametrize("pending", ["new", "dirty", "deleted"])
+def test_release_connection_refuses_pending_changes(db, pending):
+    counter = IdAllocator(name="test", next_value=1)
+    if pending != "new":
+        db.add(counter)
+        db.commit()
+
+    if pending == "new":
+        db.add(counter)
+    elif pending == "dirty":
+        counter.next_value = 2
+    else:
+        db.delete(counter)
+
+    with pytest.raises(RuntimeError):
+        release_connection(db)
+
+
+def test_login_holds_no_connection_while_hashing(engine, db, monkeypatch):
+    db.add(UserRegistration(
+        id=1,
+        first_name="f",
+        last_name="l",
+        email="a@x.com",
+        mobile="0000000001",
+        password="stored-hash",
+        gender_id=1,
+        age=30,
+        dob=datetime.date(1990, 1, 1),
+        inv_reg_id="I0001",
+        role_id=1,
+        is_active=True,
+        is_verified=True,
+        created_date=datetime.datetime(2026, 1, 1),
+    ))
+    db.commit()
+    db.close()
+
+    checked_out = []
+
+    async def verify_stub(plain_password, hashed_password):
+        checked_out.append(engine.pool.checkedout())
+        return True, None
+
+    monkeypatch.setattr(user_service, "verify_password_and_update_async", verify_stub)
+
+    result = asyncio.run(user_service.login_user(db, UserLogin(email="a@x.com", password="secret1")))
+
+    assert result["Customer-ID"] == "I0001"
+    assert checked_out == [0]
@@ -0,0 +1,31 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from utils.hash_password import HashingExecutor
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_hash_finishes():
+    executor = HashingExecutor(workers=1, max_pending=1)
+
+    async def scenario():
+        caller = asyncio.create_task(executor.run(time.sleep, 0.3))
+        await asyncio.sleep(0.05)
+        caller.cancel()  # client went away; the hash is still running
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(HTTPException) as busy:
+            await executor.run(time.sleep, 0)
+        assert busy.value.status_code == 503
+
+        await asyncio.sleep(0.4)
+        await executor.run(time.sleep, 0)
+
+    try:
+        asyncio.run(scenario())
+        assert executor.stats()["queued"] == 0
+        assert executor.rejected == 1
+    finally:
+        executor.shutdown()
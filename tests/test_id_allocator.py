@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import create_engine
+
+from models.generated_models import IdAllocator
+from services import id_allocator_service
+from services.id_allocator_service import HiLoAllocator
+
+SEED = 1000
+
+
+@pytest.fixture
+def allocator_engine(tmp_path, monkeypatch):
+    # file-backed: every pooled connection sees the same counter row
+    engine = create_engine(f"sqlite:///{tmp_path / 'ids.db'}", connect_args={"timeout": 30})
+    IdAllocator.metadata.create_all(engine, tables=[IdAllocator.__table__])
+    monkeypatch.setattr(id_allocator_service, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+def test_concurrent_allocators_never_hand_out_duplicates(allocator_engine):
+    # several "workers", each with its own in-memory block, sharing one counter
+    allocators = [HiLoAllocator("test_ids", lambda conn: SEED, block_size=7) for _ in range(4)]
+
+    def take(i):
+        return [allocators[i % len(allocators)].next() for _ in range(50)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        ids = [value for chunk in pool.map(take, range(8)) for value in chunk]
+
+    assert len(ids) == 400
+    assert len(set(ids)) == 400
+    # first reservation starts at the seed
+    assert min(ids) == SEED
+
+
+def test_seed_is_used_only_for_the_first_reservation(allocator_engine):
+    seeded = []
+
+    def seed(conn):
+        seeded.append(True)
+        return SEED
+
+    first = HiLoAllocator("test_seed", seed, block_size=5)
+    second = HiLoAllocator("test_seed", seed, block_size=5)
+
+    assert [first.next() for _ in range(3)] == [SEED, SEED + 1, SEED + 2]
+    # the second worker gets the next block, not the seed again
+    assert second.next() == SEED + 5
+    assert len(seeded) == 1
@@ -0,0 +1,88 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.generated_models import UserPortfolioSummary, UserRegistration
+from services import user_service
+from services.user_service import get_all_users, get_user_by_inv_reg_id
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    UserRegistration.metadata.create_all(
+        engine, tables=[UserRegistration.__table__, UserPortfolioSummary.__table__]
+    )
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def add_investors(db, count: int):
+    for i in range(1, count + 1):
+        db.add(UserRegistration(
+            id=i,
+            first_name="f",
+            last_name="l",
+            email=f"u{i}@x.com",
+            mobile=f"{i:010d}",
+            password="x",
+            gender_id=1,
+            age=30,
+            dob=datetime.date(1990, 1, 1),
+            inv_reg_id=f"I{i:04d}",
+            role_id=1,
+            created_date=datetime.datetime(2026, 1, 1),
+        ))
+        # half the investors have invested
+        if i % 2:
+            db.add(UserPortfolioSummary(user_id=i, investment_count=1, total_principal_amount=1000))
+    db.commit()
+
+
+def count_statements(db, fn):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return result, len(statements)
+
+
+@pytest.mark.parametrize("investors", [5, 60])
+def test_get_all_users_page_is_one_statement(db, investors):
+    add_investors(db, investors)
+
+    (rows, next_cursor), statements = count_statements(db, lambda: get_all_users(db, limit=20))
+
+    assert statements == 1
+    assert len(rows) == min(investors, 20)
+    assert next_cursor == (20 if investors > 20 else None)
+    assert rows[0]["total_principal_amount"] == 1000
+
+
+@pytest.mark.parametrize("stored, typed", [
+    ("I0042", ["I0042"]),                     # width widened, re-pad not run yet
+    ("I00000042", ["I0042", "I00000042"]),    # after scripts.migrate_inv_reg_ids
+])
+def test_old_customer_id_still_finds_a_repadded_investor(db, monkeypatch, stored, typed):
+    monkeypatch.setattr(user_service, "INV_REG_ID_WIDTH", 8)
+    add_investors(db, 1)
+    db.query(UserRegistration).update({UserRegistration.inv_reg_id: stored})
+    db.commit()
+
+    for inv_reg_id in typed:
+        assert get_user_by_inv_reg_id(db, inv_reg_id).inv_reg_id == stored
+    assert get_user_by_inv_reg_id(db, "I0043") is None
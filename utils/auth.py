@@ -1,23 +1,123 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import Optional
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 
-from core.database import get_db
+from core.database import get_async_db
 from models.generated_models import UserRegistration
+from utils.cache import TTLCache
 from utils.jwt import SECRET_KEY, ALGORITHM
 
 security = HTTPBearer()
 
 
-def get_current_user(
+# ---------------------------
+# AUTH CACHE
+# ---------------------------
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+# token -> decoded claims (never outlives the token's own exp)
+_token_cache = TTLCache(maxsize=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL_SECONDS)
+
+# sub (inv_reg_id or str(user.id)) -> Principal
+_principal_cache = TTLCache(maxsize=AUTH_CACHE_MAX_ENTRIES, ttl=AUTH_CACHE_TTL_SECONDS)
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Slim snapshot of the authenticated user.
+    Routes only need these fields, so the full row is not kept around.
+    """
+    id: int
+    role_id: int
+    is_active: Optional[bool]
+    inv_reg_id: Optional[str]
+
+
+def invalidate_user(user: UserRegistration):
+    """
+    Drop cached principals for a user.
+    Call after any write that changes the user's role, status or credentials.
+    """
+    _principal_cache.pop(str(user.id))
+    if user.inv_reg_id:
+        _principal_cache.pop(user.inv_reg_id)
+
+
+def auth_cache_stats() -> dict:
+    return {
+        "tokens": _token_cache.stats(),
+        "principals": _principal_cache.stats(),
+    }
+
+
+def _decode_access_token(token: str) -> dict:
+    payload = _token_cache.get(token)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+    exp = payload.get("exp")
+    if exp is not None:
+        _token_cache.set(token, payload, ttl=exp - time.time())
+
+    return payload
+
+
+async def _load_principal(db: AsyncSession, sub: str) -> Optional[Principal]:
+    principal = _principal_cache.get(sub)
+    if principal is not None:
+        return principal
+
+    stmt = select(
+        UserRegistration.id,
+        UserRegistration.role_id,
+        UserRegistration.is_active,
+        UserRegistration.inv_reg_id,
+    )
+
+    # 🔑 IMPORTANT FIX
+    if sub.isdigit():
+        # Admin / Super Admin → sub = user.id
+        stmt = stmt.where(UserRegistration.id == int(sub))
+    else:
+        # Investor → sub = inv_reg_id
+        stmt = stmt.where(UserRegistration.inv_reg_id == sub)
+
+    row = (await db.execute(stmt.limit(1))).first()
+    # hand the connection back before the route runs (it may do slow I/O)
+    await db.commit()
+
+    if not row:
+        return None
+
+    principal = Principal(
+        id=row.id,
+        role_id=row.role_id,
+        is_active=row.is_active,
+        inv_reg_id=row.inv_reg_id,
+    )
+    _principal_cache.set(sub, principal)
+    return principal
+
+
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db),
-):
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
     token = credentials.credentials
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_access_token(token)
 
         # ✅ access token only
         if payload.get("type") != "access":
@@ -33,17 +133,7 @@ def get_current_user(
                 detail="Invalid token payload",
             )
 
-        # 🔑 IMPORTANT FIX
-        if sub.isdigit():
-            # Admin / Super Admin → sub = user.id
-            user = db.query(UserRegistration).filter(
-                UserRegistration.id == int(sub)
-            ).first()
-        else:
-            # Investor → sub = inv_reg_id
-            user = db.query(UserRegistration).filter(
-                UserRegistration.inv_reg_id == sub
-            ).first()
+        user = await _load_principal(db, sub)
 
         if not user:
             raise HTTPException(
@@ -1,5 +1,8 @@
 import os
-from sendgrid import SendGridAPIClient
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
 from sendgrid.helpers.mail import Mail,content
 from dotenv import load_dotenv
 
@@ -8,6 +11,63 @@ load_dotenv()
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 FROM_EMAIL = os.getenv("SENDGRID_FROM_EMAIL")
 
+# SENDGRID_API_HOST can point at a local stand-in (scripts/sendgrid_standin.py)
+SENDGRID_API_HOST = os.getenv("SENDGRID_API_HOST", "https://api.sendgrid.com")
+SENDGRID_CONNECT_TIMEOUT_SECONDS = float(os.getenv("SENDGRID_CONNECT_TIMEOUT_SECONDS", "3"))
+SENDGRID_READ_TIMEOUT_SECONDS = float(os.getenv("SENDGRID_READ_TIMEOUT_SECONDS", "10"))
+SENDGRID_POOL_SIZE = int(os.getenv("SENDGRID_POOL_SIZE", "10"))
+
+# SendGrid accepts at most 1000 personalizations per request
+SENDGRID_MAX_PERSONALIZATIONS = 1000
+
+
+# ---------------------------
+# SHARED HTTP CLIENT
+# ---------------------------
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """
+    Process-wide keep-alive session, so TLS setup is paid once per
+    pooled connection instead of once per message.
+    """
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=SENDGRID_POOL_SIZE,
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({
+                    "Authorization": f"Bearer {SENDGRID_API_KEY}",
+                    "Content-Type": "application/json",
+                })
+                _session = session
+
+    return _session
+
+
+def _post_mail(payload: dict):
+    response = _get_session().post(
+        f"{SENDGRID_API_HOST}/v3/mail/send",
+        json=payload,
+        timeout=(SENDGRID_CONNECT_TIMEOUT_SECONDS, SENDGRID_READ_TIMEOUT_SECONDS),
+    )
+
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f"SendGrid returned {response.status_code}: {response.text[:500]}"
+        )
+
+    return response
+
 
 def send_email(to_email: str, subject: str, body: str, is_html: bool = False):
     if not SENDGRID_API_KEY or not FROM_EMAIL:
@@ -29,8 +89,60 @@ def send_email(to_email: str, subject: str, body: str, is_html: bool = False):
         )
 
     try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        sg.send(message)
+        _post_mail(message.get())
     except Exception as e:
         print("SendGrid error:", e)
         raise
+
+
+def send_bulk(
+    recipients: list[dict],
+    subject: str,
+    body: str,
+    is_html: bool = False,
+) -> int:
+    """
+    Send one message to many recipients.
+
+    recipients: [{"email": "...", "substitutions": {"-name-": "Asha"}}, ...]
+    Substitution tags in subject/body are replaced per recipient.
+    Recipients are packed into personalizations, up to SendGrid's limit
+    per request. Returns the number of API requests made.
+    """
+    if not SENDGRID_API_KEY or not FROM_EMAIL:
+        raise RuntimeError("SendGrid configuration missing")
+
+    requests_made = 0
+
+    for start in range(0, len(recipients), SENDGRID_MAX_PERSONALIZATIONS):
+        batch = recipients[start:start + SENDGRID_MAX_PERSONALIZATIONS]
+
+        personalizations = []
+        for r in batch:
+            personalization = {"to": [{"email": r["email"]}]}
+            if r.get("substitutions"):
+                # SendGrid requires string values
+                personalization["substitutions"] = {
+                    k: str(v) for k, v in r["substitutions"].items()
+                }
+            personalizations.append(personalization)
+
+        payload = {
+            "personalizations": personalizations,
+            "from": {"email": FROM_EMAIL},
+            "subject": subject,
+            "content": [{
+                "type": "text/html" if is_html else "text/plain",
+                "value": body,
+            }],
+        }
+
+        try:
+            _post_mail(payload)
+        except Exception as e:
+            print("SendGrid bulk error:", e)
+            raise
+
+        requests_made += 1
+
+    return requests_made
@@ -0,0 +1,225 @@
+import logging
+import os
+import random
+import threading
+import time
+
+from utils.email import send_email
+from utils.sqlite_wal import SqliteWal
+
+logger = logging.getLogger(__name__)
+
+# ========================
+# EMAIL OUTBOX
+# ========================
+# Services enqueue after their DB commit; a worker pool drains the queue
+# with retries and exponential backoff. Request latency no longer depends
+# on the email provider.
+#
+# Status flow: pending → sending → sent
+#                       ↘ pending (retry, backoff) … → dead
+
+EMAIL_OUTBOX_PATH = os.getenv("EMAIL_OUTBOX_PATH", "var/email_outbox.db")
+EMAIL_OUTBOX_WORKERS = int(os.getenv("EMAIL_OUTBOX_WORKERS", "2"))
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "6"))
+EMAIL_OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_BASE_SECONDS", "5"))
+EMAIL_OUTBOX_BACKOFF_MAX_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_MAX_SECONDS", "900"))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "1"))
+EMAIL_OUTBOX_LEASE_SECONDS = 120       # reclaim rows from crashed workers
+EMAIL_OUTBOX_RETENTION_SECONDS = 7 * 24 * 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    to_email        TEXT NOT NULL,
+    subject         TEXT NOT NULL,
+    body            TEXT NOT NULL,
+    is_html         INTEGER NOT NULL DEFAULT 0,
+    status          TEXT NOT NULL DEFAULT 'pending',
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    locked_until    REAL,
+    last_error      TEXT,
+    created_at      REAL NOT NULL,
+    sent_at         REAL
+);
+CREATE INDEX IF NOT EXISTS ix_email_outbox_status_next_attempt_at
+    ON email_outbox (status, next_attempt_at);
+"""
+
+_db = SqliteWal(EMAIL_OUTBOX_PATH, SCHEMA)
+_wakeup = threading.Event()
+
+
+def enqueue_email(to_email: str, subject: str, body: str, is_html: bool = False) -> int:
+    """
+    Queue an email for background delivery.
+    Call after the DB commit so nothing is sent for a rolled-back write.
+    """
+    now = time.time()
+    with _db.transaction() as conn:
+        cursor = conn.execute(
+            "INSERT INTO email_outbox "
+            "(to_email, subject, body, is_html, next_attempt_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (to_email, subject, body, int(is_html), now, now),
+        )
+    _wakeup.set()
+    return cursor.lastrowid
+
+
+def backoff_seconds(attempts: int) -> float:
+    delay = EMAIL_OUTBOX_BACKOFF_BASE_SECONDS * (2 ** (attempts - 1))
+    delay = min(delay, EMAIL_OUTBOX_BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _claim_next():
+    now = time.time()
+    with _db.transaction() as conn:
+        row = conn.execute(
+            "SELECT id, to_email, subject, body, is_html, attempts FROM email_outbox "
+            "WHERE (status = 'pending' AND next_attempt_at <= ?) "
+            "   OR (status = 'sending' AND locked_until <= ?) "
+            "ORDER BY next_attempt_at LIMIT 1",
+            (now, now),
+        ).fetchone()
+
+        if not row:
+            return None
+
+        conn.execute(
+            "UPDATE email_outbox SET status = 'sending', locked_until = ?, "
+            "attempts = attempts + 1 WHERE id = ?",
+            (now + EMAIL_OUTBOX_LEASE_SECONDS, row[0]),
+        )
+
+    return row[0], row[1], row[2], row[3], bool(row[4]), row[5] + 1
+
+
+def _mark_sent(message_id: int):
+    with _db.transaction() as conn:
+        conn.execute(
+            "UPDATE email_outbox SET status = 'sent', sent_at = ?, "
+            "locked_until = NULL, last_error = NULL WHERE id = ?",
+            (time.time(), message_id),
+        )
+
+
+def _mark_failed(message_id: int, attempts: int, error: str) -> str:
+    status = "dead" if attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS else "pending"
+    with _db.transaction() as conn:
+        conn.execute(
+            "UPDATE email_outbox SET status = ?, next_attempt_at = ?, "
+            "locked_until = NULL, last_error = ? WHERE id = ?",
+            (status, time.time() + backoff_seconds(attempts), error[:1000], message_id),
+        )
+    return status
+
+
+def _purge_sent():
+    cutoff = time.time() - EMAIL_OUTBOX_RETENTION_SECONDS
+    with _db.transaction() as conn:
+        conn.execute(
+            "DELETE FROM email_outbox WHERE status = 'sent' AND sent_at < ?",
+            (cutoff,),
+        )
+
+
+class OutboxWorkerPool:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self.send_ms_total = 0.0
+
+    def _record(self, outcome: str, elapsed_ms: float):
+        with self._lock:
+            self.send_ms_total += elapsed_ms
+            if outcome == "sent":
+                self.sent += 1
+            elif outcome == "dead":
+                self.dead += 1
+            else:
+                self.retried += 1
+
+    def _deliver(self, message) -> None:
+        message_id, to_email, subject, body, is_html, attempts = message
+        start = time.perf_counter()
+
+        try:
+            send_email(to_email=to_email, subject=subject, body=body, is_html=is_html)
+        except Exception as e:
+            outcome = _mark_failed(message_id, attempts, str(e))
+            logger.warning(
+                "Email %s to %s failed (attempt %s, now %s): %s",
+                message_id, to_email, attempts, outcome, e,
+            )
+        else:
+            _mark_sent(message_id)
+            outcome = "sent"
+
+        self._record(outcome, (time.perf_counter() - start) * 1000)
+
+    def _run(self):
+        last_purge = 0.0
+
+        while not self._stop.is_set():
+            try:
+                message = _claim_next()
+                if message:
+                    self._deliver(message)
+                    continue
+
+                if time.time() - last_purge > 3600:
+                    _purge_sent()
+                    last_purge = time.time()
+            except Exception:
+                logger.exception("Email outbox worker error")
+
+            _wakeup.wait(EMAIL_OUTBOX_POLL_SECONDS)
+            _wakeup.clear()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._run, name=f"email-outbox-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        _wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def stats(self) -> dict:
+        rows = _db.conn.execute(
+            "SELECT status, COUNT(*) FROM email_outbox GROUP BY status"
+        ).fetchall()
+        attempts = self.sent + self.retried + self.dead
+
+        return {
+            "workers": self.workers,
+            "queue": dict(rows),
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead_lettered": self.dead,
+            "avg_send_ms": round(self.send_ms_total / attempts, 2) if attempts else 0.0,
+        }
+
+
+outbox_workers = OutboxWorkerPool(EMAIL_OUTBOX_WORKERS)
+
+
+def email_outbox_stats() -> dict:
+    return outbox_workers.stats()
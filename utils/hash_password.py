@@ -1,12 +1,187 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# ========================
+# HASH POLICY
+# ========================
+# New hashes use PASSWORD_HASH_SCHEME at the configured cost. Hashes made
+# with another scheme or a lower cost still verify, and are reported as
+# needing an upgrade so login can rehash them.
+
+SUPPORTED_SCHEMES = ("bcrypt", "argon2")
+
+PASSWORD_HASH_SCHEME = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # KiB
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "4"))
+
+
+def build_crypt_context(
+    scheme: str = PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = BCRYPT_ROUNDS,
+    argon2_time_cost: int = ARGON2_TIME_COST,
+    argon2_memory_cost: int = ARGON2_MEMORY_COST,
+    argon2_parallelism: int = ARGON2_PARALLELISM,
+) -> CryptContext:
+    if scheme not in SUPPORTED_SCHEMES:
+        raise RuntimeError(f"Unsupported PASSWORD_HASH_SCHEME: {scheme}")
+
+    # default scheme first, the rest stay verifiable but deprecated
+    schemes = [scheme] + [s for s in SUPPORTED_SCHEMES if s != scheme]
+
+    return CryptContext(
+        schemes=schemes,
+        default=scheme,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = build_crypt_context()
 
 def hash_password(password: str) -> str:
     # bcrypt max length = 72 characters → safely truncate
     password = password[:72]
     return pwd_context.hash(password)
 
+def is_password_hash(value: str) -> bool:
+    """True if value is a hash of one of the supported schemes."""
+    return pwd_context.identify(value, required=False) is not None
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     plain_password = plain_password[:72]
     return pwd_context.verify(plain_password, hashed_password)
+
+def verify_password_and_update(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """
+    Returns (is_valid, new_hash).
+    new_hash is set only when the password is valid and the stored hash
+    does not match the current policy; callers should persist it.
+    """
+    plain_password = plain_password[:72]
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+# ========================
+# HASHING EXECUTOR
+# ========================
+# bcrypt releases the GIL while hashing, so a separately sized thread pool
+# gives real parallelism without pickling overhead of a process pool.
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(HASH_WORKERS * 4)))
+
+
+class HashingExecutor:
+    """
+    Bounded executor for password hashing.
+    - At most `workers` hashes run at once
+    - At most `max_pending` hashes are running or queued; beyond that
+      callers get an immediate 503 instead of waiting
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max(max_pending, workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix="password-hash",
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.max_queue_wait_ms = 0.0
+
+    def _call(self, submitted_at: float, fn, *args):
+        waited_ms = (time.perf_counter() - submitted_at) * 1000
+
+        with self._lock:
+            self._running += 1
+            self.max_queue_wait_ms = max(self.max_queue_wait_ms, waited_ms)
+
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self.completed += 1
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Server busy, please retry shortly",
+                    headers={"Retry-After": "1"},
+                )
+            self._pending += 1
+
+        try:
+            future = self._executor.submit(self._call, time.perf_counter(), fn, *args)
+        except BaseException:
+            self._done()
+            raise
+        # released when the job finishes, not when the caller stops
+        # waiting: a cancelled request's hash keeps running
+        future.add_done_callback(self._done)
+        return await asyncio.wrap_future(future)
+
+    def _done(self, future=None):
+        with self._lock:
+            self._pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "max_queue_wait_ms": round(self.max_queue_wait_ms, 2),
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing_executor = HashingExecutor(HASH_WORKERS, HASH_MAX_PENDING)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hashing_executor.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await hashing_executor.run(verify_password, plain_password, hashed_password)
+
+
+async def verify_password_and_update_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    return await hashing_executor.run(
+        verify_password_and_update, plain_password, hashed_password
+    )
+
+
+def hashing_stats() -> dict:
+    return hashing_executor.stats()
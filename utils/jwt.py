@@ -42,6 +42,17 @@ def create_reset_password_token(email: str):
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
+# 📎 DIRECT UPLOAD TOKEN (presigned bond upload → create investment)
+def create_upload_token(user_id: int, key: str, expires_in: int):
+    payload = {
+        "sub": str(user_id),
+        "key": key,
+        "type": "upload",
+        "exp": datetime.utcnow() + timedelta(seconds=expires_in),
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
+
+
 
 
 
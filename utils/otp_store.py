@@ -1,55 +1,201 @@
+import heapq
+import json
+import os
 import random
+import threading
 import time
 
+from utils.hash_password import is_password_hash
+from utils.sqlite_wal import SqliteWal
+
 # ========================
-# OTP storage
+# EXPIRING KEY-VALUE STORE
 # ========================
+# OTP_STORE_BACKEND:
+#   memory → per-process dict with heap-based expiry (single worker only)
+#   sqlite → SQLite WAL file shared by every worker on the node
 
-# email -> {otp, expiry}
-_otp_store = {}
+OTP_STORE_BACKEND = os.getenv("OTP_STORE_BACKEND", "memory")
+OTP_STORE_PATH = os.getenv("OTP_STORE_PATH", "var/otp_store.db")
 
 OTP_EXPIRY_SECONDS = 300  # 5 minutes
+PENDING_REGISTRATION_TTL_SECONDS = int(
+    os.getenv("PENDING_REGISTRATION_TTL_SECONDS", "1800")
+)
+VERIFIED_TTL_SECONDS = int(os.getenv("VERIFIED_TTL_SECONDS", "1800"))
 
 
-def generate_otp(email: str) -> str:
-    otp = str(random.randint(100000, 999999))
-    _otp_store[email] = {
-        "otp": otp,
-        "expiry": time.time() + OTP_EXPIRY_SECONDS,
-    }
-    return otp
+class MemoryStore:
+    """
+    In-process store. Values are JSON round-tripped so behaviour matches
+    the shared backend. Expired keys are swept from a min-heap on every
+    call, so memory stays bounded by live entries.
+    """
 
+    def __init__(self):
+        self._data = {}   # key -> (expires_at, json_value)
+        self._heap = []   # (expires_at, key)
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            entry = self._data.get(key)
+            # skip heap items left behind by an overwrite
+            if entry and entry[0] == expires_at:
+                del self._data[key]
+
+    def _live(self, key: str, now: float):
+        entry = self._data.get(key)
+        if entry and entry[0] > now:
+            return entry
+        return None
+
+    def set(self, key: str, value, ttl: float):
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._sweep(now)
+            self._data[key] = (expires_at, json.dumps(value))
+            heapq.heappush(self._heap, (expires_at, key))
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            entry = self._live(key, now)
+        return json.loads(entry[1]) if entry else None
+
+    def pop(self, key: str):
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            entry = self._live(key, now)
+            if entry:
+                del self._data[key]
+        return json.loads(entry[1]) if entry else None
+
+    def pop_if_equal(self, key: str, value) -> bool:
+        now = time.time()
+        with self._lock:
+            self._sweep(now)
+            entry = self._live(key, now)
+            if not entry or entry[1] != json.dumps(value):
+                return False
+            del self._data[key]
+            return True
+
+    def exists(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+class SqliteStore:
+    """
+    Store shared by all worker processes on a node (SQLite in WAL mode).
+    Expired rows are ignored on read and purged periodically on write.
+    """
 
-def verify_otp(email: str, otp: str) -> bool:
-    record = _otp_store.get(email)
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS kv_store (
+        key        TEXT PRIMARY KEY,
+        value      TEXT NOT NULL,
+        expires_at REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS ix_kv_store_expires_at ON kv_store (expires_at);
+    """
 
-    if not record:
-        return False
+    PURGE_INTERVAL_SECONDS = 60
+
+    def __init__(self, path: str):
+        self.db = SqliteWal(path, self.SCHEMA)
+        self._last_purge = 0.0
+
+    def _purge(self, conn, now: float):
+        if now - self._last_purge < self.PURGE_INTERVAL_SECONDS:
+            return
+        self._last_purge = now
+        conn.execute("DELETE FROM kv_store WHERE expires_at <= ?", (now,))
+
+    def set(self, key: str, value, ttl: float):
+        now = time.time()
+        with self.db.transaction() as conn:
+            self._purge(conn, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv_store (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl),
+            )
+
+    def get(self, key: str):
+        row = self.db.conn.execute(
+            "SELECT value FROM kv_store WHERE key = ? AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pop(self, key: str):
+        with self.db.transaction() as conn:
+            row = conn.execute(
+                "DELETE FROM kv_store WHERE key = ? AND expires_at > ? "
+                "RETURNING value",
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pop_if_equal(self, key: str, value) -> bool:
+        with self.db.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM kv_store WHERE key = ? AND value = ? AND expires_at > ?",
+                (key, json.dumps(value), time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def exists(self, key: str) -> bool:
+        return self.get(key) is not None
+
+
+def _create_store():
+    if OTP_STORE_BACKEND == "memory":
+        return MemoryStore()
+    if OTP_STORE_BACKEND == "sqlite":
+        return SqliteStore(OTP_STORE_PATH)
+    raise RuntimeError(f"Unknown OTP_STORE_BACKEND: {OTP_STORE_BACKEND}")
+
+
+store = _create_store()
 
-    if time.time() > record["expiry"]:
-        del _otp_store[email]
-        return False
 
-    if record["otp"] != otp:
-        return False
+# ========================
+# OTP storage
+# ========================
+
+# otp:<email> -> otp
 
-    del _otp_store[email]
-    return True
+
+def generate_otp(email: str) -> str:
+    otp = str(random.randint(100000, 999999))
+    store.set(f"otp:{email}", otp, OTP_EXPIRY_SECONDS)
+    return otp
+
+
+def verify_otp(email: str, otp: str) -> bool:
+    # consumed only on a match; expired OTPs never match
+    return store.pop_if_equal(f"otp:{email}", otp)
 
 
 # ========================
 # VERIFIED USERS (OTP passed)
 # ========================
 
-_verified_users = set()  # email or inv_reg_id
+# verified:<email or inv_reg_id> -> true
 
 
 def mark_verified(identifier: str):
-    _verified_users.add(identifier)
+    store.set(f"verified:{identifier}", True, VERIFIED_TTL_SECONDS)
 
 
 def is_verified(identifier: str) -> bool:
-    return identifier in _verified_users
+    return store.exists(f"verified:{identifier}")
 
 
 
@@ -57,9 +203,8 @@ def is_verified(identifier: str) -> bool:
 # ========================
 # TEMP USER DATA STORE
 # ========================
-# email -> full user data (dict)
-
-_user_temp_store = {}
+# pending:<email> -> full user data (JSON-serialisable dict), password
+# already hashed: the sqlite backend writes it to disk
 
 
 def store_user_data(email: str, user_data: dict):
@@ -67,7 +212,9 @@ def store_user_data(email: str, user_data: dict):
     Temporarily store user registration data
     until OTP verification
     """
-    _user_temp_store[email] = user_data
+    if not is_password_hash(user_data.get("password", "")):
+        raise ValueError("pending registration must carry a hashed password")
+    store.set(f"pending:{email}", user_data, PENDING_REGISTRATION_TTL_SECONDS)
 
 
 def pop_user_data(email: str):
@@ -75,13 +222,13 @@ def pop_user_data(email: str):
     Get and remove stored user data
     after OTP verification
     """
-    return _user_temp_store.pop(email, None)
+    return store.pop(f"pending:{email}")
 
 def is_user_registered(email: str) -> bool:
     """
     Check if the user has a pending registration (OTP not verified yet)
     """
-    return email in _user_temp_store
+    return store.exists(f"pending:{email}")
 
 
 
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import threading
+from typing import Awaitable, Callable, Optional
+
+from utils.cache import TTLCache
+
+# ========================
+# RESPONSE CACHE
+# ========================
+# Caches whole read responses keyed by (route, role, query params).
+# - Concurrent identical misses share one computation (single-flight)
+# - invalidate(route) bumps the route's generation: older entries and
+#   in-flight results become unreachable and age out through TTL / LRU
+# Per process: other workers see a write after at most the TTL.
+# Cached routes are async (get_or_compute_async): followers await an
+# asyncio future of the leader instead of blocking a thread.
+
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+DASHBOARD_ROUTE = "/admin/dashboard"
+PLANS_ROUTE = "/plans/"
+
+_MISSING = object()
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = 1024, ttl: float = 30):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._inflight: dict = {}
+        self._generations: dict = {}
+        self._lock = threading.Lock()
+        self.computed = 0
+        self.coalesced = 0
+
+    def _key(self, route: str, params: dict, role: Optional[int]):
+        return (
+            route,
+            self._generations.get(route, 0),
+            role,
+            tuple(sorted((k, v) for k, v in params.items() if v is not None)),
+        )
+
+    async def get_or_compute_async(self, route: str, params: dict,
+                                   compute: Callable[[], Awaitable], role: Optional[int] = None):
+        key = self._key(route, params, role)
+
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        # single event loop per worker: no lock needed between check and set
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                # shield: a cancelled follower must not cancel the shared future
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # the leader's request went away mid-compute: take over
+                return await self.get_or_compute_async(route, params, compute, role)
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # retrieved here so a failure nobody awaited is not logged as an error
+            future.exception()
+            raise
+        else:
+            self._cache.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            self.computed += 1
+            self._inflight.pop(key, None)
+
+    def invalidate(self, *routes: str):
+        with self._lock:
+            for route in routes:
+                self._generations[route] = self._generations.get(route, 0) + 1
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        requests = stats["hits"] + self.coalesced + self.computed
+        saved = stats["hits"] + self.coalesced
+        stats.update(
+            computed=self.computed,
+            coalesced=self.coalesced,
+            saved_queries=saved,
+            hit_ratio=round(saved / requests, 4) if requests else 0.0,
+        )
+        return stats
+
+
+response_cache = ResponseCache(
+    maxsize=RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=RESPONSE_CACHE_TTL_SECONDS,
+)
+
+
+def response_cache_stats() -> dict:
+    return response_cache.stats()
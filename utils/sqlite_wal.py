@@ -0,0 +1,67 @@
+import os
+import sqlite3
+import threading
+
+# ========================
+# LOCAL SQLITE (WAL) HELPER
+# ========================
+# Node-local state shared by every uvicorn worker on the same host.
+# WAL lets readers and one writer work concurrently across processes.
+
+
+class SqliteWal:
+    def __init__(self, path: str, schema: str):
+        self.path = path
+        self.schema = schema
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(self.schema)
+                    self._initialized = True
+
+        return conn
+
+    def transaction(self):
+        """
+        BEGIN IMMEDIATE ... COMMIT / ROLLBACK.
+        Takes the write lock up front so read-modify-write is atomic
+        across processes.
+        """
+        return _Transaction(self.conn)
+
+
+class _Transaction:
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
@@ -1,51 +1,448 @@
 import os
 import uuid
-import shutil
-from fastapi import UploadFile
+import hashlib
+import logging
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import anyio
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, UploadFile, status
+from starlette.concurrency import run_in_threadpool
+
+from utils.metrics import Histogram
+
+logger = logging.getLogger(__name__)
 
 BASE_UPLOAD_DIR = "uploads/bonds"
 
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 256 * 1024
+UPLOAD_ALLOWED_EXTENSIONS = {
+    ext.strip().lower()
+    for ext in os.getenv("UPLOAD_ALLOWED_EXTENSIONS", "pdf,doc,docx,png,jpg,jpeg").split(",")
+    if ext.strip()
+}
 
-def save_locally(upload_file: UploadFile) -> str:
-    os.makedirs(BASE_UPLOAD_DIR, exist_ok=True)
 
-    ext = upload_file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
-    file_path = os.path.join(BASE_UPLOAD_DIR, filename)
+PRESIGNED_UPLOAD_EXPIRES_SECONDS = int(os.getenv("PRESIGNED_UPLOAD_EXPIRES_SECONDS", "900"))
 
-    with open(file_path, "wb") as f:
-        shutil.copyfileobj(upload_file.file, f)
+MB = 1024 * 1024
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "20"))
+S3_CONNECT_TIMEOUT_SECONDS = float(os.getenv("S3_CONNECT_TIMEOUT_SECONDS", "5"))
+S3_READ_TIMEOUT_SECONDS = float(os.getenv("S3_READ_TIMEOUT_SECONDS", "60"))
+S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", "3"))
+S3_MULTIPART_THRESHOLD_MB = int(os.getenv("S3_MULTIPART_THRESHOLD_MB", "8"))
+S3_MULTIPART_CHUNKSIZE_MB = int(os.getenv("S3_MULTIPART_CHUNKSIZE_MB", "8"))
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "4"))
 
-    # return URL-style path (important)
-    return f"/uploads/bonds/{filename}"
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_THRESHOLD_MB * MB,
+    multipart_chunksize=S3_MULTIPART_CHUNKSIZE_MB * MB,
+    max_concurrency=S3_MAX_CONCURRENCY,
+    use_threads=True,
+)
 
 
-def upload_to_cloud(upload_file: UploadFile) -> str:
-    s3 = boto3.client(
-        "s3",
-        aws_access_key_id=os.getenv("AWS_ACCESS_KEY"),
-        aws_secret_access_key=os.getenv("AWS_SECRET_KEY"),
-        region_name=os.getenv("AWS_REGION")
-    )
+@dataclass(frozen=True)
+class StoredFile:
+    url: str
+    size: int
+    sha256: Optional[str]       # None for direct (presigned) uploads
+    content_type: Optional[str]
+    deduplicated: bool = False
+
 
-    key = f"bonds/{uuid.uuid4()}-{upload_file.filename}"
+# ---------------------------
+# CONTENT-ADDRESSED LAYOUT
+# ---------------------------
+# Blobs are named by their SHA-256, so re-uploading the same document
+# reuses the existing blob. InvConfig.upload_file rows are the references;
+# scripts/gc_uploads.py removes blobs nothing references any more.
 
-    s3.upload_fileobj(
-        upload_file.file,
+def blob_name(sha256: str, ext: str) -> str:
+    return f"{sha256[:2]}/{sha256}.{ext}"
+
+
+_s3 = None
+_s3_lock = threading.Lock()
+
+
+def _s3_client():
+    """
+    Process-wide S3 client, created on first use.
+    boto3 clients are thread-safe; sharing one reuses credential
+    resolution, endpoint setup and its connection pool.
+    """
+    global _s3
+
+    if _s3 is None:
+        with _s3_lock:
+            if _s3 is None:
+                _s3 = boto3.client(
+                    "s3",
+                    aws_access_key_id=os.getenv("AWS_ACCESS_KEY"),
+                    aws_secret_access_key=os.getenv("AWS_SECRET_KEY"),
+                    region_name=os.getenv("AWS_REGION"),
+                    # S3-compatible stand-in (MinIO, moto) for local runs
+                    endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+                    config=Config(
+                        max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                        connect_timeout=S3_CONNECT_TIMEOUT_SECONDS,
+                        read_timeout=S3_READ_TIMEOUT_SECONDS,
+                        retries={"max_attempts": S3_MAX_ATTEMPTS, "mode": "standard"},
+                    ),
+                )
+
+    return _s3
+
+
+# ---------------------------
+# UPLOAD METRICS
+# ---------------------------
+_upload_ms = Histogram()
+_upload_mb_per_s = Histogram(buckets=(0.5, 1, 2, 5, 10, 25, 50, 100, 250))
+_upload_stats_lock = threading.Lock()
+_upload_bytes_total = 0
+_upload_seconds_total = 0.0
+
+
+def _s3_upload(fileobj, key: str, size: int, content_type: Optional[str]):
+    global _upload_bytes_total, _upload_seconds_total
+
+    start = time.perf_counter()
+    _s3_client().upload_fileobj(
+        fileobj,
         os.getenv("S3_BUCKET"),
         key,
-        ExtraArgs={"ContentType": upload_file.content_type}
+        ExtraArgs={"ContentType": content_type},
+        Config=S3_TRANSFER_CONFIG,
+    )
+    elapsed = time.perf_counter() - start
+
+    mb_per_s = (size / MB) / elapsed if elapsed > 0 else 0.0
+    _upload_ms.observe(elapsed * 1000)
+    _upload_mb_per_s.observe(mb_per_s)
+    with _upload_stats_lock:
+        _upload_bytes_total += size
+        _upload_seconds_total += elapsed
+
+    logger.info(
+        "S3 upload key=%s bytes=%s duration_ms=%.1f throughput_mb_s=%.2f",
+        key, size, elapsed * 1000, mb_per_s,
     )
 
+
+def storage_stats() -> dict:
+    with _upload_stats_lock:
+        bytes_total, seconds_total = _upload_bytes_total, _upload_seconds_total
+
+    return {
+        "s3_upload_ms": _upload_ms.snapshot(),
+        "s3_upload_mb_per_s": _upload_mb_per_s.snapshot(),
+        "s3_upload_bytes_total": bytes_total,
+        "s3_upload_bytes_per_s": round(bytes_total / seconds_total, 1) if seconds_total else 0.0,
+    }
+
+
+def _s3_url(key: str) -> str:
+    endpoint = os.getenv("S3_ENDPOINT_URL")
+    if endpoint:
+        return f"{endpoint.rstrip('/')}/{os.getenv('S3_BUCKET')}/{key}"
     return f"https://{os.getenv('S3_BUCKET')}.s3.amazonaws.com/{key}"
 
 
-def store_file(upload_file: UploadFile) -> str:
+def _s3_key(url: str) -> str:
+    prefix = _s3_url("")
+    if not url.startswith(prefix):
+        raise ValueError(f"Not a blob URL for this bucket: {url}")
+    return url[len(prefix):]
+
+
+def _s3_object_exists(s3, key: str) -> bool:
+    try:
+        s3.head_object(Bucket=os.getenv("S3_BUCKET"), Key=key)
+        return True
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+
+
+def _s3_touch(s3, key: str, content_type: Optional[str]) -> bool:
+    """
+    Metadata-only self copy: refreshes LastModified (GC grace period).
+    False if the object is gone (removed by GC since it was found).
+    """
+    bucket = os.getenv("S3_BUCKET")
+    try:
+        s3.copy_object(
+            Bucket=bucket,
+            Key=key,
+            CopySource={"Bucket": bucket, "Key": key},
+            MetadataDirective="REPLACE",
+            ContentType=content_type or "application/octet-stream",
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return False
+        raise
+    return True
+
+
+# ---------------------------
+# STREAMING UPLOAD STAGE
+# ---------------------------
+def _safe_extension(upload_file: UploadFile) -> str:
+    return _extension_from_filename(upload_file.filename)
+
+
+def _extension_from_filename(filename: Optional[str]) -> str:
+    # never trust the client filename beyond a whitelisted extension
+    ext = os.path.splitext(filename or "")[1].lstrip(".").lower()
+
+    if ext not in UPLOAD_ALLOWED_EXTENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported file type. Allowed: {', '.join(sorted(UPLOAD_ALLOWED_EXTENSIONS))}",
+        )
+
+    return ext
+
+
+async def _stream_to(upload_file: UploadFile, dest) -> tuple[int, str]:
+    """
+    Copy the upload to `dest` (async file) in fixed chunks.
+    Aborts with 413 as soon as UPLOAD_MAX_BYTES is exceeded.
+    Returns (size, sha256 hex digest) computed in the same pass.
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    while True:
+        chunk = await upload_file.read(UPLOAD_CHUNK_BYTES)
+        if not chunk:
+            break
+
+        size += len(chunk)
+        if size > UPLOAD_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds {UPLOAD_MAX_BYTES} bytes",
+            )
+
+        digest.update(chunk)
+        await dest.write(chunk)
+
+    return size, digest.hexdigest()
+
+
+async def save_locally(upload_file: UploadFile) -> StoredFile:
+    ext = _safe_extension(upload_file)
+    os.makedirs(BASE_UPLOAD_DIR, exist_ok=True)
+
+    # the name depends on the digest, so stream to a temp file first
+    tmp_path = os.path.join(BASE_UPLOAD_DIR, f".tmp-{uuid.uuid4()}")
+
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as f:
+            size, sha256 = await _stream_to(upload_file, f)
+
+        name = blob_name(sha256, ext)
+        file_path = os.path.join(BASE_UPLOAD_DIR, name)
+
+        try:
+            # fresh mtime keeps the blob inside the GC grace period
+            os.utime(file_path)
+            deduplicated = True
+        except FileNotFoundError:
+            # not stored yet, or just removed by GC: store this copy
+            deduplicated = False
+
+        if deduplicated:
+            os.remove(tmp_path)
+        else:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            os.replace(tmp_path, file_path)
+    except BaseException:
+        # don't leave partial files behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # return URL-style path (important)
+    return StoredFile(
+        url=f"/uploads/bonds/{name}",
+        size=size,
+        sha256=sha256,
+        content_type=upload_file.content_type,
+        deduplicated=deduplicated,
+    )
+
+
+async def upload_to_cloud(upload_file: UploadFile) -> StoredFile:
+    ext = _safe_extension(upload_file)
+    s3 = _s3_client()
+
+    # size-check + hash into a spool first, so nothing oversized reaches S3;
+    # the spool stays in memory up to one multipart chunk, then goes to disk
+    with tempfile.SpooledTemporaryFile(max_size=S3_MULTIPART_CHUNKSIZE_MB * MB) as spool:
+        size, sha256 = await _stream_to(upload_file, anyio.wrap_file(spool))
+        spool.seek(0)
+
+        key = f"bonds/{blob_name(sha256, ext)}"
+        deduplicated = await run_in_threadpool(_s3_object_exists, s3, key)
+        if deduplicated:
+            deduplicated = await run_in_threadpool(_s3_touch, s3, key, upload_file.content_type)
+
+        if not deduplicated:
+            await run_in_threadpool(
+                _s3_upload, spool, key, size, upload_file.content_type
+            )
+
+    return StoredFile(
+        url=_s3_url(key),
+        size=size,
+        sha256=sha256,
+        content_type=upload_file.content_type,
+        deduplicated=deduplicated,
+    )
+
+
+async def store_file(upload_file: UploadFile) -> StoredFile:
     """
     Single entry point.
     Switch storage without touching service code.
     """
     if os.getenv("ENV") == "production":
-        return upload_to_cloud(upload_file)
-    return save_locally(upload_file)
+        return await upload_to_cloud(upload_file)
+    return await save_locally(upload_file)
+
+
+# ---------------------------
+# DIRECT (PRESIGNED) UPLOADS
+# ---------------------------
+# Step 1: the client gets a presigned POST and PUTs the bytes straight
+#         to the object store under bonds/direct/.
+# Step 2: POST /investments/ sends the upload token; the object's
+#         existence and size are checked with a HEAD request.
+
+def direct_uploads_enabled() -> bool:
+    return os.getenv("ENV") == "production"
+
+
+def create_presigned_upload(filename: str, content_type: str) -> dict:
+    if not direct_uploads_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Direct uploads require object storage",
+        )
+
+    ext = _extension_from_filename(filename)
+    key = f"bonds/direct/{uuid.uuid4()}.{ext}"
+
+    # presigning is a local computation, no request to S3
+    presigned = _s3_client().generate_presigned_post(
+        Bucket=os.getenv("S3_BUCKET"),
+        Key=key,
+        Fields={"Content-Type": content_type},
+        Conditions=[
+            {"Content-Type": content_type},
+            ["content-length-range", 1, UPLOAD_MAX_BYTES],
+        ],
+        ExpiresIn=PRESIGNED_UPLOAD_EXPIRES_SECONDS,
+    )
+
+    return {
+        "key": key,
+        "url": presigned["url"],
+        "fields": presigned["fields"],
+        "expires_in": PRESIGNED_UPLOAD_EXPIRES_SECONDS,
+        "max_bytes": UPLOAD_MAX_BYTES,
+    }
+
+
+def _head_direct_upload(key: str) -> StoredFile:
+    try:
+        head = _s3_client().head_object(Bucket=os.getenv("S3_BUCKET"), Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Uploaded file not found. Upload it before submitting.",
+            )
+        raise
+
+    size = head["ContentLength"]
+    if size <= 0 or size > UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File must be between 1 and {UPLOAD_MAX_BYTES} bytes",
+        )
+
+    return StoredFile(
+        url=_s3_url(key),
+        size=size,
+        sha256=None,
+        content_type=head.get("ContentType"),
+    )
+
+
+async def resolve_direct_upload(key: str) -> StoredFile:
+    return await run_in_threadpool(_head_direct_upload, key)
+
+
+# ---------------------------
+# BLOB LISTING (GC)
+# ---------------------------
+def iter_blobs():
+    """
+    Yield (url, last_modified_epoch) for every stored blob, using the same
+    URL form that is saved in InvConfig.upload_file.
+    """
+    if os.getenv("ENV") == "production":
+        s3 = _s3_client()
+        paginator = s3.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=os.getenv("S3_BUCKET"), Prefix="bonds/"):
+            for obj in page.get("Contents", []):
+                yield _s3_url(obj["Key"]), obj["LastModified"].timestamp()
+        return
+
+    for root, _, files in os.walk(BASE_UPLOAD_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            yield "/" + path.replace(os.sep, "/"), os.path.getmtime(path)
+
+
+def blob_modified_at(url: str) -> Optional[float]:
+    """Last-modified epoch of one blob, None if it no longer exists."""
+    if os.getenv("ENV") == "production":
+        try:
+            head = _s3_client().head_object(Bucket=os.getenv("S3_BUCKET"), Key=_s3_key(url))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return head["LastModified"].timestamp()
+
+    path = url.lstrip("/")
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
+
+def delete_blob(url: str):
+    if os.getenv("ENV") == "production":
+        _s3_client().delete_object(Bucket=os.getenv("S3_BUCKET"), Key=_s3_key(url))
+        return
+
+    path = url.lstrip("/")
+    if os.path.exists(path):
+        os.remove(path)